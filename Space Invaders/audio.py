@@ -0,0 +1,75 @@
+import pygame
+
+class AudioManager:
+    def __init__(self, channels=16, enabled=True):
+        self.enabled = enabled and pygame.mixer.get_init() is not None
+        self.sounds = {}
+        self.limits = {}
+        self.priorities = {}
+        self.channels = []
+        self.voices = []
+        self.serial = 0
+
+        if self.enabled:
+            # Every channel belongs to the pool, reserving them keeps Sound.play() elsewhere from stealing one
+            pygame.mixer.set_num_channels(channels)
+            pygame.mixer.set_reserved(channels)
+            self.channels = [pygame.mixer.Channel(i) for i in range(channels)]
+            self.voices = [None] * channels
+
+    def load(self, name, path, volume=1.0, limit=4, priority=0):
+        self.limits[name] = limit
+        self.priorities[name] = priority
+        if self.enabled:
+            sound = pygame.mixer.Sound(path)
+            sound.set_volume(volume)
+            self.sounds[name] = sound
+
+    def play(self, name, loops=0):
+        if not self.enabled:
+            return None
+
+        priority = self.priorities[name]
+        free = None
+        same = []
+        victim = None
+        for i, channel in enumerate(self.channels):
+            voice = self.voices[i]
+            if voice and not channel.get_busy():
+                voice = self.voices[i] = None
+            if not voice:
+                if free is None:
+                    free = i
+                continue
+            if voice[0] == name:
+                same.append(i)
+            # Lowest priority first, oldest among equals
+            if voice[1] <= priority and (victim is None or (voice[1], voice[2]) < self.voices[victim][1:]):
+                victim = i
+
+        if len(same) >= self.limits[name]:
+            slot = min(same, key=lambda i: self.voices[i][2])  # Voice limit reached: restart the oldest voice of this sound
+        elif free is not None:
+            slot = free
+        elif victim is not None:
+            slot = victim  # Pool exhausted: cull the least important voice
+        else:
+            return None
+
+        self.serial += 1
+        self.voices[slot] = (name, priority, self.serial)
+        channel = self.channels[slot]
+        channel.play(self.sounds[name], loops=loops)
+        return channel
+
+    def stop(self, name=None):
+        for i, channel in enumerate(self.channels):
+            if self.voices[i] and (name is None or self.voices[i][0] == name):
+                channel.stop()
+                self.voices[i] = None
+
+    def play_music(self, path, volume=1.0, loops=-1):
+        if self.enabled:
+            pygame.mixer.music.load(path)  # Music is streamed from disk, never fully decoded into memory
+            pygame.mixer.music.set_volume(volume)
+            pygame.mixer.music.play(loops)
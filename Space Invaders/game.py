@@ -1,8 +1,18 @@
 # Importing required libraries
-import math      # For calculating distance between bullet and enemy
-import random    # For generating random positions for enemies
+import argparse  # For reading game options from the command line
 import pygame    # Main library for game development
-from pygame import mixer  # For playing sound/music
+from audio import AudioManager  # Pooled channels and preloaded sounds
+from swarm import Swarm         # NumPy-backed enemy movement and collision
+from weapons import BulletPool  # Preallocated pool of bullets in flight
+from render import load_image, load_background, TextCache, FrameLimiter  # Converted images, cached text, frame limiting
+
+# Command line options
+parser = argparse.ArgumentParser(description="Space Invaders")
+parser.add_argument('--enemies', type=int, default=6, help="number of enemies on screen")
+parser.add_argument('--max-bullets', type=int, default=1, help="most bullets in flight at once")
+parser.add_argument('--fps', type=int, default=60, help="frame rate cap (0 = uncapped)")
+parser.add_argument('--fire-delay', type=int, default=0, help="frames between shots while space is held (0 = one shot per press)")
+args = parser.parse_args()
 
 # Initialize all pygame modules
 pygame.init()
@@ -10,12 +20,16 @@ pygame.init()
 # Create the game screen with width = 800 and height = 600
 screen = pygame.display.set_mode((800, 600))
 
-# Load background image
-background = pygame.image.load('background.png')
+# Load background image, flattened onto black so the frame never needs clearing
+background = load_background('background.png')
 
-# Load and play background music on loop (-1 means infinite loop)
-mixer.music.load("background.wav")
-mixer.music.play(-1)
+# Preload sound effects once (never load from disk inside the game loop)
+audio = AudioManager(channels=8)
+audio.load('laser', "laser.wav", limit=2, priority=1)          # Shot sound, at most 2 overlapping
+audio.load('explosion', "explosion.wav", limit=4, priority=2)  # Hit sound, culls shots when the pool is full
+
+# Stream background music on loop (-1 means infinite loop)
+audio.play_music("background.wav")
 
 # Set window title and icon
 pygame.display.set_caption("Space Invaders")
@@ -23,83 +37,61 @@ icon = pygame.image.load('ufo.png')
 pygame.display.set_icon(icon)
 
 # Load player spaceship image and set initial position
-playerImg = pygame.image.load('player.png')
+playerImg = load_image('player.png')
 playerX = 370  # Horizontal position
 playerY = 480  # Vertical position (fixed)
 playerX_change = 0  # Change in X (used for movement)
 
-# Load enemy spaceship images and set their initial positions and speed
-enemyImg = []         # List to hold enemy images
-enemyX = []           # List to hold X positions of enemies
-enemyY = []           # List to hold Y positions of enemies
-enemyX_change = []    # List to hold X-axis movement speed
-enemyY_change = []    # List to hold Y-axis drop after hitting screen edge
-num_of_enemies = 6    # Number of enemies on screen
-
-# Generate multiple enemies
-for i in range(num_of_enemies):
-    enemyImg.append(pygame.image.load('enemy.png'))
-    enemyX.append(random.randint(0, 736))   # Random X position
-    enemyY.append(random.randint(50, 150))  # Random Y position
-    enemyX_change.append(4)                # Horizontal speed
-    enemyY_change.append(40)               # Drop down when edge is hit
-
-# Bullet setup
-bulletImg = pygame.image.load('bullet.png')
-bulletX = 0
-bulletY = 480  # Initial Y position of bullet
-bulletX_change = 0
-bulletY_change = 10  # Speed of bullet going upward
-bullet_state = "ready"  # "ready" = can fire, "fire" = bullet is on screen
+# Enemy swarm: one shared sprite, positions and speeds kept in NumPy arrays
+enemyImg = load_image('enemy.png')
+num_of_enemies = args.enemies  # Number of enemies on screen
+enemies = Swarm(enemyImg, num_of_enemies, speed=4, drop=40)
+
+# Bullet setup: every bullet in flight lives in one preallocated pool
+bulletImg = load_image('bullet.png')
+bulletY = 480  # Initial Y position of bullets
+bullets = BulletPool(bulletImg, args.max_bullets, speed=10, fire_delay=args.fire_delay)
+firing = False  # True while space is held down
 
 # Score setup
 score_value = 0
 font = pygame.font.Font('freesansbold.ttf', 32)
+score_text = TextCache(font)  # Score is only re-rendered when it changes
 textX = 10  # X position of score display
 testY = 10  # Y position of score display
 
 # Game Over font
 over_font = pygame.font.Font('freesansbold.ttf', 64)
+over_text = TextCache(over_font)
+
+# Frame limiter with frame time statistics (F3 shows them)
+limiter = FrameLimiter(args.fps)
+stats_font = pygame.font.Font('freesansbold.ttf', 16)
+show_stats = False
+stats_surface = None
 
 # Function to show score on screen
 def show_score(x, y):
-    score = font.render("Score : " + str(score_value), True, (255, 255, 255))
+    score = score_text.render("Score : " + str(score_value), (255, 255, 255))
     screen.blit(score, (x, y))
 
 # Function to display "GAME OVER" text
 def game_over_text():
-    over_text = over_font.render("GAME OVER", True, (255, 255, 255))
-    screen.blit(over_text, (200, 250))
+    screen.blit(over_text.render("GAME OVER", (255, 255, 255)), (200, 250))
 
 # Function to draw player spaceship on screen
 def player(x, y):
     screen.blit(playerImg, (x, y))
 
-# Function to draw enemy spaceship on screen
-def enemy(x, y, i):
-    screen.blit(enemyImg[i], (x, y))
-
-# Function to fire the bullet
+# Function to fire a bullet from the player's position
 def fire_bullet(x, y):
-    global bullet_state
-    bullet_state = "fire"  # Bullet is now moving
-    screen.blit(bulletImg, (x + 16, y + 10))  # Adjust bullet position for center
-
-# Function to detect collision between bullet and enemy
-def isCollision(enemyX, enemyY, bulletX, bulletY):
-    distance = math.sqrt(math.pow(enemyX - bulletX, 2) + (math.pow(enemyY - bulletY, 2)))
-    if distance < 27:  # If they are close enough, it’s a hit
-        return True
-    else:
-        return False
+    if bullets.fire(x, y):  # Only fires if the pool has room and the weapon has cooled down
+        audio.play('laser')
 
 # Main Game Loop
 running = True
 while running:
-    # Fill the screen with black color before drawing everything
-    screen.fill((0, 0, 0))
-    
-    # Draw background image
+    # Draw background image (opaque and full-screen, so it also clears the previous frame)
     screen.blit(background, (0, 0))
 
     # Loop through events (keyboard, mouse, etc.)
@@ -113,17 +105,22 @@ while running:
                 playerX_change = -5
             if event.key == pygame.K_RIGHT:  # Move right
                 playerX_change = 5
+            if event.key == pygame.K_F3:  # Toggle frame time statistics
+                show_stats = not show_stats
             if event.key == pygame.K_SPACE:  # Fire bullet
-                if bullet_state == "ready":  # Only fire if bullet is not already moving
-                    bulletSound = mixer.Sound("laser.wav")
-                    bulletSound.play()
-                    bulletX = playerX  # Set bullet to current player position
-                    fire_bullet(bulletX, bulletY)
+                firing = True
+                fire_bullet(playerX, bulletY)  # Set bullet to current player position
 
         # If key is released, stop movement
         if event.type == pygame.KEYUP:
             if event.key == pygame.K_LEFT or event.key == pygame.K_RIGHT:
                 playerX_change = 0
+            if event.key == pygame.K_SPACE:
+                firing = False
+
+    # Keep firing while space is held, if a fire rate is set
+    if firing and bullets.fire_delay:
+        fire_bullet(playerX, bulletY)
 
     # Update player position
     playerX += playerX_change
@@ -135,53 +132,42 @@ while running:
         playerX = 736
 
     # Enemy Movement and Collision Detection
-    for i in range(num_of_enemies):
-
-        # Check if any enemy has reached close to the player (game over)
-        if enemyY[i] > 440:
-            for j in range(num_of_enemies):
-                enemyY[j] = 2000  # Move all enemies off-screen
-            game_over_text()
-            break
-
-        # Move enemy left/right
-        enemyX[i] += enemyX_change[i]
-
-        # Reverse direction and move down when hitting the edge
-        if enemyX[i] <= 0:
-            enemyX_change[i] = 4
-            enemyY[i] += enemyY_change[i]
-        elif enemyX[i] >= 736:
-            enemyX_change[i] = -4
-            enemyY[i] += enemyY_change[i]
-
-        # Check for collision between this enemy and bullet
-        collision = isCollision(enemyX[i], enemyY[i], bulletX, bulletY)
-        if collision:
-            explosionSound = mixer.Sound("explosion.wav")
-            explosionSound.play()
-            bulletY = 480  # Reset bullet position
-            bullet_state = "ready"  # Bullet can be fired again
-            score_value += 1  # Increase score
-            # Respawn enemy at random position
-            enemyX[i] = random.randint(0, 736)
-            enemyY[i] = random.randint(50, 150)
-
-        # Draw enemy
-        enemy(enemyX[i], enemyY[i], i)
-
-    # Bullet Movement
-    if bulletY <= 0:
-        bulletY = 480  # Reset bullet Y position
-        bullet_state = "ready"  # Ready to fire again
-
-    if bullet_state == "fire":
-        fire_bullet(bulletX, bulletY)  # Draw the bullet
-        bulletY -= bulletY_change      # Move bullet upward
+    # Check if any enemy has reached close to the player (game over)
+    if enemies.reached(440):
+        enemies.y[:] = 2000  # Move all enemies off-screen
+        game_over_text()
+    else:
+        # Move all enemies left/right, reversing and moving down at the edges
+        enemies.update()
+
+        # Check every bullet against every enemy in one batched step
+        hits = bullets.collide(enemies, 27)  # If they are close enough, it’s a hit; the bullets are recycled
+        if len(hits):
+            audio.play('explosion')
+            score_value += len(hits)  # Increase score
+            enemies.respawn(hits)  # Respawn the enemies that were hit at random positions
+
+        # Draw all enemies in one batched call
+        enemies.draw(screen)
+
+    # Bullet Movement: move all bullets up, recycle those that left the screen, then draw them
+    bullets.update()
+    bullets.draw(screen)
 
     # Draw player and score
     player(playerX, playerY)
     show_score(textX, testY)
 
+    # Frame time statistics, refreshed twice a second
+    if show_stats:
+        if stats_surface is None or limiter.frames % 30 == 0:
+            stats = limiter.stats()
+            stats_surface = stats_font.render("%.0f fps  %.1f ms  work %.1f ms  worst %d ms  load %.0f%%" % (
+                stats['fps'], stats['frame_ms'], stats['work_ms'], stats['worst_ms'], stats['load'] * 100), True, (255, 255, 255))
+        screen.blit(stats_surface, (10, 575))
+
     # Update the screen with all drawings
     pygame.display.update()
+
+    # Wait for the next frame instead of spinning the CPU
+    limiter.tick()
@@ -0,0 +1,69 @@
+# Render resources: display-format images, a cache of rendered text and a
+# frame limiter that measures how long each frame really takes.
+from collections import OrderedDict, deque
+
+import pygame
+
+
+# Load an image already converted to the screen's pixel format, so blits skip the conversion
+def load_image(path, alpha=True):
+    image = pygame.image.load(path)
+    return image.convert_alpha() if alpha else image.convert()
+
+
+# Load a full-screen image flattened onto a solid color, so it can be blitted opaque with no clearing
+def load_background(path, color=(0, 0, 0)):
+    image = pygame.image.load(path)
+    background = pygame.Surface(image.get_size()).convert()
+    background.fill(color)
+    background.blit(image, (0, 0))
+    return background
+
+
+# Rendered text surfaces keyed by their content; only new strings are rendered
+class TextCache:
+    def __init__(self, font, size=64):
+        self.font = font
+        self.size = size                 # Most surfaces kept before the least recently used is dropped
+        self.surfaces = OrderedDict()
+
+    def render(self, text, color=(255, 255, 255)):
+        key = (text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.font.render(text, True, color).convert_alpha()
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+
+# Caps the frame rate and keeps timing statistics over the last frames
+class FrameLimiter:
+    def __init__(self, fps=60, window=120):
+        self.fps = fps                   # 0 = uncapped
+        self.clock = pygame.time.Clock()
+        self.frames = 0                  # Frames ticked so far
+        self.frame_ms = deque(maxlen=window)  # Full frame time, including the wait
+        self.work_ms = deque(maxlen=window)   # Time spent actually producing the frame
+
+    def tick(self):
+        self.clock.tick(self.fps)
+        self.frames += 1
+        self.frame_ms.append(self.clock.get_time())
+        self.work_ms.append(self.clock.get_rawtime())
+
+    def stats(self):
+        if not self.frame_ms:
+            return {'fps': 0.0, 'frame_ms': 0.0, 'work_ms': 0.0, 'worst_ms': 0, 'load': 0.0}
+        frame = sum(self.frame_ms) / len(self.frame_ms)
+        work = sum(self.work_ms) / len(self.work_ms)
+        return {
+            'fps': self.clock.get_fps(),
+            'frame_ms': frame,
+            'work_ms': work,
+            'worst_ms': max(self.frame_ms),
+            'load': work / frame if frame else 1.0,  # Share of each frame spent working rather than sleeping
+        }
@@ -0,0 +1,101 @@
+# Enemy swarm stored as NumPy arrays so thousands of invaders move, bounce
+# and collide in a handful of vectorized operations per frame.
+import numpy as np
+
+
+class Swarm:
+    def __init__(self, image, count, speed=4, drop=40, min_x=0, max_x=736, spawn_y=(50, 150), seed=None):
+        self.image = image           # One sprite shared by every invader
+        self.speed = speed           # Horizontal speed
+        self.drop = drop             # Drop down when an edge is hit
+        self.min_x = min_x
+        self.max_x = max_x
+        self.spawn_y = spawn_y
+        self.rng = np.random.default_rng(seed)
+
+        self.x = np.zeros(count)                  # X positions
+        self.y = np.zeros(count)                  # Y positions
+        self.x_change = np.full(count, float(speed))  # Current horizontal velocity
+        self.respawn(np.arange(count))
+
+    def __len__(self):
+        return len(self.x)
+
+    # Move invaders to new random positions at the top of the screen
+    def respawn(self, indices):
+        self.x[indices] = self.rng.integers(self.min_x, self.max_x + 1, len(indices))
+        self.y[indices] = self.rng.integers(self.spawn_y[0], self.spawn_y[1] + 1, len(indices))
+
+    # Move every invader, reversing direction and dropping down at the screen edges
+    def update(self):
+        self.x += self.x_change
+        left = self.x <= self.min_x
+        right = self.x >= self.max_x
+        self.x_change[left] = self.speed
+        self.x_change[right] = -self.speed
+        self.y[left | right] += self.drop
+
+    # True if any invader has come lower than the given height
+    def reached(self, y):
+        return bool((self.y > y).any())
+
+    # Match points (bullets) against invaders within radius, using a uniform grid
+    # broadphase so the cost grows with points + invaders rather than their product.
+    # Returns (point indices, invader indices); each point and invader is used once.
+    def collide(self, px, py, radius):
+        empty = np.zeros(0, dtype=np.intp)
+        if not len(px) or not len(self.x):
+            return empty, empty
+
+        cell = radius * 2
+        ex = np.floor_divide(self.x, cell).astype(np.int64)
+        ey = np.floor_divide(self.y, cell).astype(np.int64)
+        bx = np.floor_divide(px, cell).astype(np.int64)
+        by = np.floor_divide(py, cell).astype(np.int64)
+        top = min(ey.min(), by.min()) - 1
+        span = int(max(ey.max(), by.max()) - top) + 2  # Rows per column in the cell key
+        keys = ex * span + (ey - top)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+
+        # Key of each of the 3x3 neighbour cells around every point
+        offsets = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+        query = ((bx[:, None] + offsets[:, 0]) * span + (by[:, None] + offsets[:, 1] - top)).ravel()
+        lo = np.searchsorted(sorted_keys, query, 'left')
+        counts = np.searchsorted(sorted_keys, query, 'right') - lo
+        total = int(counts.sum())
+        if not total:
+            return empty, empty
+
+        # Expand every (point, cell) range into candidate (point, invader) pairs
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        point = np.repeat(np.arange(len(query)) // len(offsets), counts)
+        enemy = order[starts + np.arange(total)]
+        dx = self.x[enemy] - px[point]
+        dy = self.y[enemy] - py[point]
+        dist = dx * dx + dy * dy
+        hit = dist < radius * radius
+        point, enemy, dist = point[hit], enemy[hit], dist[hit]
+        if not len(point):
+            return empty, empty
+
+        # Greedy matching, closest pairs first: every point claims its nearest invader, every invader keeps
+        # the nearest point claiming it, and the rest retry against the invaders still free until none is in range
+        by_dist = np.argsort(dist, kind='stable')
+        point, enemy = point[by_dist], enemy[by_dist]
+        points, enemies = [], []
+        while len(point):
+            _, first = np.unique(point, return_index=True)
+            first.sort()  # np.unique orders by point index, back to distance order
+            claim_point, claim_enemy = point[first], enemy[first]
+            _, first = np.unique(claim_enemy, return_index=True)
+            points.append(claim_point[first])
+            enemies.append(claim_enemy[first])
+            free = ~np.isin(point, points[-1]) & ~np.isin(enemy, enemies[-1])
+            point, enemy = point[free], enemy[free]
+        return np.concatenate(points), np.concatenate(enemies)
+
+    # Draw the whole swarm with a single batched blit call
+    def draw(self, surf):
+        image = self.image
+        surf.blits([(image, pos) for pos in zip(self.x.tolist(), self.y.tolist())], doreturn=False)
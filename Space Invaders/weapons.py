@@ -0,0 +1,53 @@
+# Preallocated bullet pool: positions live in fixed-size NumPy arrays, the
+# live bullets are always packed at the front, and removal swaps the last
+# live bullet into the freed slot.
+import numpy as np
+
+
+class BulletPool:
+    def __init__(self, image, capacity, speed=10, fire_delay=0):
+        self.image = image
+        self.capacity = capacity        # Most bullets allowed in flight
+        self.speed = speed              # Speed of bullets going upward
+        self.fire_delay = fire_delay    # Frames between shots
+        self.cooldown = 0
+        self.count = 0                  # Live bullets occupy x[:count], y[:count]
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+
+    def __len__(self):
+        return self.count
+
+    # Launch a bullet if the pool has room and the weapon has cooled down
+    def fire(self, x, y):
+        if self.cooldown or self.count == self.capacity:
+            return False
+        self.x[self.count] = x
+        self.y[self.count] = y
+        self.count += 1
+        self.cooldown = self.fire_delay
+        return True
+
+    # Remove bullets by index, moving the last live bullet into each hole
+    def remove(self, indices):
+        for i in sorted(indices, reverse=True):
+            self.count -= 1
+            self.x[i] = self.x[self.count]
+            self.y[i] = self.y[self.count]
+
+    # Move bullets upward and recycle the ones that left the screen
+    def update(self):
+        self.cooldown = max(0, self.cooldown - 1)
+        self.y[:self.count] -= self.speed
+        self.remove(np.flatnonzero(self.y[:self.count] <= 0).tolist())
+
+    # Resolve bullet hits against a swarm, returning the invaders that were hit
+    def collide(self, swarm, radius):
+        bullets, hits = swarm.collide(self.x[:self.count], self.y[:self.count], radius)
+        self.remove(bullets.tolist())
+        return hits
+
+    # Draw every live bullet with a single batched blit call
+    def draw(self, surf):
+        image = self.image
+        surf.blits([(image, (x + 16, y + 10)) for x, y in zip(self.x[:self.count].tolist(), self.y[:self.count].tolist())], doreturn=False)
@@ -0,0 +1,271 @@
+# Network client for server.py. The map is loaded locally, entities and effect events
+# come from the server, and the player is predicted locally and reconciled against the
+# server's state using the input sequence numbers it acknowledges.
+#
+#   python client.py --session 1
+#   python client.py --session 1 --spectate
+#   python client.py --session 2 --headless --bot --ticks 1800   # scripted load test
+
+import argparse
+import math
+import queue
+import random
+import socket
+import time
+from collections import deque
+
+import pygame
+
+from game import Game, TICK_RATE
+from scripts.entities import Enemy
+from scripts.particle import Particle
+from scripts.spark import Spark
+from scripts.net import Connection, DEFAULT_PORT, POSITION_QUANTUM, VELOCITY_QUANTUM, ANGLE_QUANTUM
+from scripts.net import INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, INPUT_DASH, MSG_HELLO, MSG_INPUT, MSG_WELCOME, MSG_LEVEL, MSG_SNAPSHOT
+from scripts.net import ROLE_PLAYER, EVENT_SPARK, EVENT_PARTICLE, EVENT_BURST, EVENT_SOUND
+from scripts.net import ACTIONS, PARTICLE_TYPES, SOUNDS, HELLO, INPUT, WELCOME, LEVEL, unpack_snapshot
+
+CORRECTION_THRESHOLD = 0.5  # Pixels the reconciled player may differ from the prediction before it counts as a correction
+
+
+class ClientGame(Game):
+    def __init__(self, headless=False, quality='high'):
+        self.predicting = False
+        self.net_enemies = {}
+        self.net_projectiles = {}
+        super().__init__(headless=headless, quality=quality)
+
+    def load_level(self, map_id):
+        super().load_level(map_id)
+        self.enemies = []  # Sent by the server along with the rest of the level state
+        self.net_enemies = {}
+        self.net_projectiles = {}
+
+    # Effects of the predicted player arrive as server events, spawning them here too would double them
+    def add_spark(self, spark):
+        if not self.predicting:
+            super().add_spark(spark)
+
+    def add_particle(self, particle):
+        if not self.predicting:
+            super().add_particle(particle)
+
+    def predict(self, bits):
+        self.predicting = True
+        audio, dead, screenshake = self.audio.enabled, self.dead, self.screenshake
+        self.audio.enabled = False  # Same for sounds, and deaths are only taken from the server
+        self.movement = [bool(bits & INPUT_LEFT), bool(bits & INPUT_RIGHT)]
+        if bits & INPUT_JUMP:
+            self.player.jump()
+        if bits & INPUT_DASH:
+            self.player.dash()
+        self.player.update(self.tilemap, (self.movement[1] - self.movement[0], 0))
+        self.audio.enabled, self.dead, self.screenshake = audio, dead, screenshake
+        self.predicting = False
+
+
+def set_player_state(player, state):
+    x, y, vx, vy, air_time, jumps, dashing, flags, action = state
+    player.pos = [x, y]
+    player.velocity = [vx, vy]
+    player.air_time = air_time
+    player.jumps = jumps
+    player.dashing = dashing
+    player.flip = bool(flags & 1)
+    player.last_movement = [(0, 1, -1)[flags >> 1], 0]
+    player.set_action(ACTIONS[action])
+    player.wall_slide = player.action == 'wall_slide'  # Needed by wall jumps, only set during updates otherwise
+
+
+class NetClient:
+    def __init__(self, game, host='127.0.0.1', port=DEFAULT_PORT, session=1, spectate=False):
+        self.game = game
+        self.conn = Connection(socket.create_connection((host, port)))
+        self.conn.send(MSG_HELLO, HELLO.pack(session, int(spectate)))
+        self.conn.flush()
+        self.role = None
+        self.sequence = 0
+        self.pending = deque()  # (sequence, bits) sent but not yet applied by the server
+        self.held = 0  # Movement bits of the last input the server applied, it keeps them while starved of inputs
+        self.authoritative = None  # Last player state received
+        self.snapshots = 0
+        self.corrections = 0
+
+    def poll(self):
+        for kind, payload in self.conn.receive():
+            if kind == MSG_WELCOME:
+                self.role = WELCOME.unpack(payload)[1]
+            elif kind == MSG_LEVEL:
+                self.game.level = LEVEL.unpack(payload)[0]
+                self.game.load_level(self.game.level)
+                self.authoritative = None
+            elif kind == MSG_SNAPSHOT:
+                self.apply(unpack_snapshot(payload))
+
+    def apply(self, snapshot):
+        game = self.game
+        self.snapshots += 1
+        game.screenshake = snapshot['screenshake']
+        game.transition = snapshot['transition']
+        game.dead = snapshot['dead']
+
+        for net_id, x, y, flags in snapshot['enemies']:
+            pos = (x / POSITION_QUANTUM, y / POSITION_QUANTUM)
+            enemy = game.net_enemies.get(net_id)
+            if enemy is None:
+                enemy = game.net_enemies[net_id] = Enemy(game, pos, (8, 15))
+                game.enemies.append(enemy)
+            enemy.pos = list(pos)
+            enemy.flip = bool(flags & 1)
+            enemy.set_action(ACTIONS[flags >> 1])
+        for net_id in snapshot['removed_enemies']:
+            enemy = game.net_enemies.pop(net_id, None)
+            if enemy:
+                game.enemies.remove(enemy)
+
+        # Projectiles fly straight, so only their spawn and removal are sent and they move locally in between
+        for net_id, x, y, direction in snapshot['projectiles']:
+            projectile = game.net_projectiles[net_id] = [[x / POSITION_QUANTUM, y / POSITION_QUANTUM], direction / 2, 0]
+            game.projectiles.append(projectile)
+        for net_id in snapshot['removed_projectiles']:
+            projectile = game.net_projectiles.pop(net_id, None)
+            if projectile:
+                game.projectiles.remove(projectile)
+
+        for event in snapshot['events']:
+            self.spawn(event)
+
+        if snapshot['player']:
+            self.authoritative = snapshot['player']
+        if self.role == ROLE_PLAYER:
+            self.reconcile(snapshot['ack'], snapshot['held'])
+        elif self.authoritative:
+            set_player_state(game.player, self.authoritative)
+
+    def spawn(self, event):
+        game = self.game
+        kind = event[0]
+        if kind == EVENT_SPARK:
+            game.add_spark(Spark((event[1] / POSITION_QUANTUM, event[2] / POSITION_QUANTUM), event[3] / ANGLE_QUANTUM, event[4] / VELOCITY_QUANTUM))
+        elif kind == EVENT_PARTICLE:
+            game.add_particle(Particle(game, PARTICLE_TYPES[event[1]], (event[2] / POSITION_QUANTUM, event[3] / POSITION_QUANTUM), velocity=[event[4] / VELOCITY_QUANTUM, event[5] / VELOCITY_QUANTUM], frame=event[6]))
+        elif kind == EVENT_BURST:
+            game.burst((event[1] / POSITION_QUANTUM, event[2] / POSITION_QUANTUM), event[3])
+        elif kind == EVENT_SOUND:
+            game.audio.play(SOUNDS[event[1]])
+
+    def reconcile(self, ack, held):
+        while self.pending and self.pending[0][0] <= ack:
+            self.held = self.pending.popleft()[1] & (INPUT_LEFT | INPUT_RIGHT)
+        if self.authoritative is None or self.game.dead:
+            return  # The server does not move a dead player, there is nothing to replay until the level reloads
+
+        # Rewind to the server's state, replay the ticks it ran without input, then the inputs it has not seen yet
+        player = self.game.player
+        predicted = tuple(player.pos)
+        action, animation = player.action, player.animation
+        set_player_state(player, self.authoritative)
+        for i in range(held):
+            self.game.predict(self.held)
+        for sequence, bits in self.pending:
+            self.game.predict(bits)
+        if player.action == action:
+            player.animation = animation  # Replays would otherwise fast forward the animation
+        if math.dist(predicted, player.pos) > CORRECTION_THRESHOLD:
+            self.corrections += 1
+
+    def tick(self, bits):
+        game = self.game
+        self.poll()
+
+        if self.role == ROLE_PLAYER and not game.dead:
+            self.sequence += 1
+            self.conn.send(MSG_INPUT, INPUT.pack(self.sequence, bits))
+            self.pending.append((self.sequence, bits))
+            game.predict(bits)
+        elif self.role != ROLE_PLAYER:
+            game.player.animation.update()
+        self.conn.flush()
+
+        # What the server does not stream is simulated here
+        for enemy in game.enemies:
+            enemy.animation.update()
+        for projectile in game.projectiles:
+            projectile[0][0] += projectile[1]
+        game.follow_camera()
+        game.spawn_leaves()
+        game.clouds.update()
+        game.update_effects()
+
+
+def read_input(game, commands):
+    bits = (INPUT_LEFT if game.movement[0] else 0) | (INPUT_RIGHT if game.movement[1] else 0)
+    while not commands.empty():
+        command = commands.get()
+        if command == 'jump':
+            bits |= INPUT_JUMP
+        if command == 'dash':
+            bits |= INPUT_DASH
+    return bits
+
+
+def bot_input(game, rng, ticks):
+    # Wanders back and forth, jumping and dashing now and then
+    if ticks % 90 == 0:
+        game.movement = [False, False]
+        game.movement[rng.randrange(2)] = rng.random() < 0.8
+    bits = (INPUT_LEFT if game.movement[0] else 0) | (INPUT_RIGHT if game.movement[1] else 0)
+    if rng.random() < 0.03:
+        bits |= INPUT_JUMP
+    if rng.random() < 0.01:
+        bits |= INPUT_DASH
+    return bits
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Network client for The Assassin')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--session', type=int, default=1, help='session to join, created by the first client')
+    parser.add_argument('--spectate', action='store_true', help='watch instead of playing')
+    parser.add_argument('--headless', action='store_true', help='no window or audio')
+    parser.add_argument('--bot', action='store_true', help='play with a scripted bot instead of the keyboard')
+    parser.add_argument('--ticks', type=int, default=0, help='quit after this many ticks and print statistics (0 = run until closed)')
+    args = parser.parse_args()
+
+    game = ClientGame(headless=args.headless)
+    client = NetClient(game, args.host, args.port, args.session, args.spectate)
+    if not args.headless:
+        game.audio.play_music('data/music.wav', volume=0.5)
+        game.audio.play('ambience', loops=-1)
+
+    commands = queue.Queue()
+    rng = random.Random(args.session)
+    ticks = 0
+    tick = 1 / TICK_RATE
+    next_tick = time.perf_counter()
+    while not client.conn.closed and (not args.ticks or ticks < args.ticks):
+        if not args.headless:
+            game.handle_events(commands)
+        bits = bot_input(game, rng, ticks) if args.bot else read_input(game, commands)
+        client.tick(bits)
+        if not args.headless:
+            game.render()
+            pygame.display.update()
+        ticks += 1
+
+        # Paced like the server rather than with the clock, which rounds to whole milliseconds and would send inputs faster than they are consumed
+        next_tick += tick
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        elif delay < -tick * 15:
+            next_tick = time.perf_counter()
+
+    seconds = ticks / TICK_RATE
+    print('%d ticks, %d snapshots, %.1f KiB received (%.2f KiB/s), %d sent, %d prediction corrections' % (
+        ticks, client.snapshots, client.conn.bytes_in / 1024, client.conn.bytes_in / 1024 / max(seconds, 1e-9), client.conn.bytes_out, client.corrections))
+
+
+if __name__ == '__main__':
+    main()
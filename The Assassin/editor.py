@@ -1,11 +1,15 @@
 import sys
+import time
 
 import pygame
 
 from scripts.utils import load_images
 from scripts.tilemap import Tilemap
+from scripts.journal import EditJournal, EditHistory
+from scripts.chunks import ChunkCache, MIP_LEVELS
 
 RENDER_SCALE = 2.0
+AUTOSAVE_INTERVAL = 10
 
 class Editor:
     def __init__(self):
@@ -34,6 +38,12 @@ class Editor:
         except FileNotFoundError:
             pass
         
+        self.journal = EditJournal('map.json')
+        self.journal.replay(self.tilemap)
+        self.chunks = ChunkCache(self.tilemap, self.assets)
+        self.history = EditHistory(self.tilemap, self.journal, listener=self.chunks)
+        self.last_save = time.time()
+        
         self.scroll = [0, 0]
         
         self.tile_list = list(self.assets)
@@ -44,55 +54,83 @@ class Editor:
         self.right_clicking = False
         self.shift = False
         self.ongrid = True
+        self.zoom_level = 0
+        self.show_minimap = True
+        
+    def set_zoom(self, level):
+        level = max(0, min(MIP_LEVELS - 1, level))
+        # Keep the centre of the view in place
+        old_scale = 1 << self.zoom_level
+        new_scale = 1 << level
+        self.scroll[0] += self.display.get_width() * (old_scale - new_scale) / 2
+        self.scroll[1] += self.display.get_height() * (old_scale - new_scale) / 2
+        self.zoom_level = level
         
     def run(self):
         while True:
             self.display.fill((0, 0, 0))
             
-            self.scroll[0] += (self.movement[1] - self.movement[0]) * 2
-            self.scroll[1] += (self.movement[3] - self.movement[2]) * 2
+            zoom_scale = 1 << self.zoom_level  # World pixels per display pixel
+            
+            self.scroll[0] += (self.movement[1] - self.movement[0]) * 2 * zoom_scale
+            self.scroll[1] += (self.movement[3] - self.movement[2]) * 2 * zoom_scale
             render_scroll = (int(self.scroll[0]), int(self.scroll[1]))
             
-            self.tilemap.render(self.display, offset=render_scroll)
+            self.chunks.render(self.display, offset=render_scroll, level=self.zoom_level)
             
             current_tile_img = self.assets[self.tile_list[self.tile_group]][self.tile_variant].copy()
             current_tile_img.set_alpha(100)
+            preview_img = current_tile_img
+            if zoom_scale > 1:
+                preview_img = pygame.transform.scale(current_tile_img, (max(1, current_tile_img.get_width() // zoom_scale), max(1, current_tile_img.get_height() // zoom_scale)))
             
             mpos = pygame.mouse.get_pos()
             mpos = (mpos[0] / RENDER_SCALE, mpos[1] / RENDER_SCALE)
-            tile_pos = (int((mpos[0] + self.scroll[0]) // self.tilemap.tile_size), int((mpos[1] + self.scroll[1]) // self.tilemap.tile_size))
+            wpos = (mpos[0] * zoom_scale + self.scroll[0], mpos[1] * zoom_scale + self.scroll[1])
+            tile_pos = (int(wpos[0] // self.tilemap.tile_size), int(wpos[1] // self.tilemap.tile_size))
             
             if self.ongrid:
-                self.display.blit(current_tile_img, (tile_pos[0] * self.tilemap.tile_size - self.scroll[0], tile_pos[1] * self.tilemap.tile_size - self.scroll[1]))
+                self.display.blit(preview_img, ((tile_pos[0] * self.tilemap.tile_size - self.scroll[0]) / zoom_scale, (tile_pos[1] * self.tilemap.tile_size - self.scroll[1]) / zoom_scale))
             else:
-                self.display.blit(current_tile_img, mpos)
+                self.display.blit(preview_img, mpos)
             
             if self.clicking and self.ongrid:
-                self.tilemap.tilemap[str(tile_pos[0]) + ';' + str(tile_pos[1])] = {'type': self.tile_list[self.tile_group], 'variant': self.tile_variant, 'pos': tile_pos}
+                self.history.set_tile(str(tile_pos[0]) + ';' + str(tile_pos[1]), {'type': self.tile_list[self.tile_group], 'variant': self.tile_variant, 'pos': list(tile_pos)})
             if self.right_clicking:
                 tile_loc = str(tile_pos[0]) + ';' + str(tile_pos[1])
                 if tile_loc in self.tilemap.tilemap:
-                    del self.tilemap.tilemap[tile_loc]
+                    self.history.set_tile(tile_loc, None)
                 for tile in self.tilemap.offgrid_tiles.copy():
                     tile_img = self.assets[tile['type']][tile['variant']]
-                    tile_r = pygame.Rect(tile['pos'][0] - self.scroll[0], tile['pos'][1] - self.scroll[1], tile_img.get_width(), tile_img.get_height())
-                    if tile_r.collidepoint(mpos):
-                        self.tilemap.offgrid_tiles.remove(tile)
+                    tile_r = pygame.Rect(tile['pos'][0], tile['pos'][1], tile_img.get_width(), tile_img.get_height())
+                    if tile_r.collidepoint(wpos):
+                        self.history.remove_offgrid(tile)
+            
+            if self.journal.entries and time.time() - self.last_save > AUTOSAVE_INTERVAL and not (self.clicking or self.right_clicking):
+                if self.journal.compact(self.tilemap):
+                    self.last_save = time.time()
             
             self.display.blit(current_tile_img, (5, 5))
             
+            if self.show_minimap:
+                self.chunks.minimap.render(self.display, (self.scroll[0], self.scroll[1], self.display.get_width() * zoom_scale, self.display.get_height() * zoom_scale), self.tilemap.tile_size)
+            
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    self.history.end()
+                    self.journal.close(self.tilemap)
                     pygame.quit()
                     sys.exit()
                     
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if event.button == 1:
                         self.clicking = True
+                        self.history.begin()
                         if not self.ongrid:
-                            self.tilemap.offgrid_tiles.append({'type': self.tile_list[self.tile_group], 'variant': self.tile_variant, 'pos': (mpos[0] + self.scroll[0], mpos[1] + self.scroll[1])})
+                            self.history.add_offgrid({'type': self.tile_list[self.tile_group], 'variant': self.tile_variant, 'pos': [wpos[0], wpos[1]]})
                     if event.button == 3:
                         self.right_clicking = True
+                        self.history.begin()
                     if self.shift:
                         if event.button == 4:
                             self.tile_variant = (self.tile_variant - 1) % len(self.assets[self.tile_list[self.tile_group]])
@@ -110,6 +148,8 @@ class Editor:
                         self.clicking = False
                     if event.button == 3:
                         self.right_clicking = False
+                    if not (self.clicking or self.right_clicking):
+                        self.history.end()
                         
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_a:
@@ -123,9 +163,27 @@ class Editor:
                     if event.key == pygame.K_g:
                         self.ongrid = not self.ongrid
                     if event.key == pygame.K_t:
-                        self.tilemap.autotile()
+                        self.history.begin()
+                        for loc, old, new in self.tilemap.autotile():
+                            self.history.record(loc, old, new)
+                        self.history.end()
                     if event.key == pygame.K_o:
-                        self.tilemap.save('map.json')
+                        self.history.end()
+                        if self.journal.compact(self.tilemap):
+                            self.last_save = time.time()
+                    if event.key == pygame.K_z and event.mod & pygame.KMOD_CTRL:
+                        if event.mod & pygame.KMOD_SHIFT:
+                            self.history.redo()
+                        else:
+                            self.history.undo()
+                    if event.key == pygame.K_y and event.mod & pygame.KMOD_CTRL:
+                        self.history.redo()
+                    if event.key == pygame.K_MINUS:
+                        self.set_zoom(self.zoom_level + 1)
+                    if event.key == pygame.K_EQUALS:
+                        self.set_zoom(self.zoom_level - 1)
+                    if event.key == pygame.K_m:
+                        self.show_minimap = not self.show_minimap
                     if event.key == pygame.K_LSHIFT:
                         self.shift = True
                 if event.type == pygame.KEYUP:
@@ -0,0 +1,271 @@
+# Gym-style environment wrapper for training agents against The Assassin.
+#
+#   env = AssassinEnv(map_id=0)
+#   obs = env.reset(seed=1)
+#   obs, reward, done, info = env.step(LEFT | JUMP)
+#
+# VectorEnv steps many games in lockstep, either in this process or spread
+# over worker processes that write observations straight into shared memory.
+# Observation arrays are views into preallocated buffers: they are
+# overwritten by the next step()/reset(), copy them if you need to keep them.
+
+import math
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+import pygame
+
+from game import Game
+
+LEFT = 1
+RIGHT = 2
+JUMP = 4
+DASH = 8
+NUM_ACTIONS = 16
+
+GRID_SIZE = (15, 11)  # Tiles around the player, in tiles
+NEAREST = 4  # Nearest enemies / projectiles included in the observation
+PLAYER_FEATURES = 10
+OBS_SIZE = PLAYER_FEATURES + GRID_SIZE[0] * GRID_SIZE[1] + NEAREST * 4 * 2
+
+REWARD_KILL = 1.0
+REWARD_DEATH = -1.0
+REWARD_COMPLETE = 5.0
+REWARD_STEP = -0.001
+
+
+class AssassinEnv:
+    def __init__(self, map_id=0, render=False, max_steps=3600, obs_buffer=None):
+        self.game = Game(headless=not render)
+        self.map_id = map_id
+        self.render_enabled = render
+        self.max_steps = max_steps
+        self.obs = obs_buffer if obs_buffer is not None else np.zeros(OBS_SIZE, dtype=np.float32)
+        self.grid = self.obs[PLAYER_FEATURES:PLAYER_FEATURES + GRID_SIZE[0] * GRID_SIZE[1]].reshape(GRID_SIZE[1], GRID_SIZE[0])
+        self.steps = 0
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.game.rng.seed(seed)
+        game = self.game
+        game.restart(self.map_id)  # Nothing carried over from the previous episode, seeded episodes reproduce
+        game.transition = 0
+        self.steps = 0
+        self._observe()
+        return self.obs
+
+    def step(self, action):
+        game = self.game
+        player = game.player
+
+        game.movement = [bool(action & LEFT), bool(action & RIGHT)]
+        if action & JUMP:
+            player.jump()
+        if action & DASH:
+            player.dash()
+
+        enemies = len(game.enemies)
+        game.update()
+        self.steps += 1
+
+        kills = enemies - len(game.enemies)
+        reward = REWARD_STEP + kills * REWARD_KILL
+        died = bool(game.dead)
+        completed = not game.enemies
+        if died:
+            reward += REWARD_DEATH
+        elif completed:
+            reward += REWARD_COMPLETE
+        done = died or completed or self.steps >= self.max_steps
+
+        if self.render_enabled:
+            game.render()
+            pygame.display.update()
+
+        self._observe()
+        return self.obs, reward, done, {'kills': kills, 'died': died, 'completed': completed, 'steps': self.steps}
+
+    def _observe(self):
+        game = self.game
+        player = game.player
+        tilemap = game.tilemap
+        tile_size = tilemap.tile_size
+        obs = self.obs
+        center = player.rect().center
+
+        obs[0] = player.pos[0] / tile_size
+        obs[1] = player.pos[1] / tile_size
+        obs[2] = player.velocity[0]
+        obs[3] = player.velocity[1]
+        obs[4] = player.flip
+        obs[5] = min(player.air_time, 120) / 120
+        obs[6] = player.jumps
+        obs[7] = player.wall_slide
+        obs[8] = player.dashing / 60
+        obs[9] = bool(game.dead)
+
+        grid = self.grid
+        grid.fill(0)
+        origin = (int(center[0] // tile_size) - GRID_SIZE[0] // 2, int(center[1] // tile_size) - GRID_SIZE[1] // 2)
+        for y in range(GRID_SIZE[1]):
+            for x in range(GRID_SIZE[0]):
+                if tilemap.solid_check(((origin[0] + x) * tile_size, (origin[1] + y) * tile_size)):
+                    grid[y, x] = 1
+
+        base = PLAYER_FEATURES + GRID_SIZE[0] * GRID_SIZE[1]
+        obs[base:].fill(0)
+        enemies = sorted(game.enemies, key=lambda e: abs(e.pos[0] - player.pos[0]) + abs(e.pos[1] - player.pos[1]))
+        for i, enemy in enumerate(enemies[:NEAREST]):
+            j = base + i * 4
+            obs[j] = (enemy.pos[0] - player.pos[0]) / tile_size
+            obs[j + 1] = (enemy.pos[1] - player.pos[1]) / tile_size
+            obs[j + 2] = enemy.flip
+            obs[j + 3] = 1
+
+        base += NEAREST * 4
+        projectiles = sorted(game.projectiles, key=lambda p: abs(p[0][0] - center[0]) + abs(p[0][1] - center[1]))
+        for i, projectile in enumerate(projectiles[:NEAREST]):
+            j = base + i * 4
+            obs[j] = (projectile[0][0] - center[0]) / tile_size
+            obs[j + 1] = (projectile[0][1] - center[1]) / tile_size
+            obs[j + 2] = math.copysign(1, projectile[1])
+            obs[j + 3] = 1
+
+
+def _worker(conn, shm_names, num_envs, first, count, env_kwargs):
+    buffers = _SharedBuffers(num_envs, shm_names)
+    envs = [AssassinEnv(obs_buffer=buffers.obs[i], **env_kwargs) for i in range(first, first + count)]
+    try:
+        while True:
+            cmd, arg = conn.recv()
+            if cmd == 'step':
+                for i, env in enumerate(envs, first):
+                    _, buffers.rewards[i], done, _ = env.step(int(buffers.actions[i]))
+                    buffers.dones[i] = done
+                    if done:
+                        env.reset()
+                conn.send(None)
+            elif cmd == 'reset':
+                for i, env in enumerate(envs, first):
+                    env.reset(None if arg is None else arg + i)
+                conn.send(None)
+            elif cmd == 'close':
+                break
+    finally:
+        del envs
+        buffers.close()
+        conn.close()
+
+
+class _SharedBuffers:
+    def __init__(self, num_envs, names=None):
+        sizes = (num_envs * OBS_SIZE * 4, num_envs * 4, num_envs, num_envs)
+        if names:
+            self.shms = [shared_memory.SharedMemory(name=name) for name in names]
+        else:
+            self.shms = [shared_memory.SharedMemory(create=True, size=size) for size in sizes]
+        self.obs = np.ndarray((num_envs, OBS_SIZE), dtype=np.float32, buffer=self.shms[0].buf)
+        self.rewards = np.ndarray(num_envs, dtype=np.float32, buffer=self.shms[1].buf)
+        self.dones = np.ndarray(num_envs, dtype=np.bool_, buffer=self.shms[2].buf)
+        self.actions = np.ndarray(num_envs, dtype=np.uint8, buffer=self.shms[3].buf)
+
+    def names(self):
+        return [shm.name for shm in self.shms]
+
+    def close(self, unlink=False):
+        del self.obs, self.rewards, self.dones, self.actions
+        for shm in self.shms:
+            shm.close()
+            if unlink:
+                shm.unlink()
+
+
+class VectorEnv:
+    def __init__(self, num_envs, workers=0, **env_kwargs):
+        self.num_envs = num_envs
+        self.workers = min(workers, num_envs)
+        self.envs = []
+        self.conns = []
+        self.procs = []
+
+        if not self.workers:
+            self.obs = np.zeros((num_envs, OBS_SIZE), dtype=np.float32)
+            self.rewards = np.zeros(num_envs, dtype=np.float32)
+            self.dones = np.zeros(num_envs, dtype=np.bool_)
+            self.envs = [AssassinEnv(obs_buffer=self.obs[i], **env_kwargs) for i in range(num_envs)]
+            return
+
+        self.buffers = _SharedBuffers(num_envs)
+        self.obs = self.buffers.obs
+        self.rewards = self.buffers.rewards
+        self.dones = self.buffers.dones
+        ctx = multiprocessing.get_context('spawn')
+        first = 0
+        for w in range(self.workers):
+            count = num_envs // self.workers + (w < num_envs % self.workers)
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_worker, args=(child, self.buffers.names(), num_envs, first, count, env_kwargs), daemon=True)
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+            first += count
+
+    def reset(self, seed=None):
+        if self.envs:
+            for i, env in enumerate(self.envs):
+                env.reset(None if seed is None else seed + i)
+        else:
+            for conn in self.conns:
+                conn.send(('reset', seed))
+            for conn in self.conns:
+                conn.recv()
+        return self.obs
+
+    def step(self, actions):
+        if self.envs:
+            for i, env in enumerate(self.envs):
+                _, self.rewards[i], done, _ = env.step(int(actions[i]))
+                self.dones[i] = done
+                if done:
+                    env.reset()
+        else:
+            self.buffers.actions[:] = actions
+            for conn in self.conns:
+                conn.send(('step', None))
+            for conn in self.conns:
+                conn.recv()
+        return self.obs, self.rewards, self.dones
+
+    def close(self):
+        for conn in self.conns:
+            conn.send(('close', None))
+        for proc in self.procs:
+            proc.join()
+        if self.procs:
+            self.buffers.close(unlink=True)
+        self.conns = []
+        self.procs = []
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Measure vectorized environment throughput with random actions.')
+    parser.add_argument('--envs', type=int, default=os.cpu_count() * 2)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--steps', type=int, default=1000)
+    args = parser.parse_args()
+
+    venv = VectorEnv(args.envs, workers=args.workers)
+    venv.reset(seed=0)
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        venv.step(rng.integers(0, NUM_ACTIONS, args.envs))
+    elapsed = time.perf_counter() - start
+    venv.close()
+    print('%d env-steps in %.2fs: %.0f env-steps/s' % (args.envs * args.steps, elapsed, args.envs * args.steps / elapsed))
@@ -1,8 +1,12 @@
 import os  # Operating system interaction
 import sys  # System-specific parameters and functions
 import math  # Math functions
-import random  # Random number generation
+import time  # High resolution timers for the fixed simulation tick
+import queue  # Thread-safe command queue between input and simulation
+import argparse  # Command line options
+import threading  # Separate simulation thread
 
+import numpy as np  # Vectorized leaf spawner rolls
 import pygame  # Pygame library for game development
 
 # Import custom modules and classes for game components and utilities
@@ -10,17 +14,38 @@ from scripts.utils import load_image, load_images, Animation
 from scripts.entities import PhysicsEntity, Player, Enemy
 from scripts.tilemap import Tilemap
 from scripts.clouds import Clouds
+from scripts.parallax import ParallaxLayer
 from scripts.particle import Particle
 from scripts.spark import Spark
+from scripts.audio import AudioManager
+from scripts.ai import AIScheduler
+from scripts.memory import MemoryManager, GC_MODES
+from scripts.quality import QualityGovernor, QUALITY_LEVELS
+from scripts.rng import RandomService
+from scripts.snapshot import RenderQueue, FrameSnapshot, lerp_scroll, interpolate, draw
+from scripts.snapshot import LAYER_BACKGROUND, LAYER_TILES, LAYER_ENEMIES, LAYER_PLAYER, LAYER_PROJECTILES, LAYER_PARTICLES
+from scripts.snapshot import BACKGROUND_LAYERS, WORLD_LAYERS, OVERLAY_LAYERS
+
+TICK_RATE = 60  # Simulation ticks per second
 
 class Game:  # Main game class
-    def __init__(self):  # Initialization of the game
+    def __init__(self, headless=False, gc_mode=None, alloc_report=False, quality='high', adaptive=False, seed=None):  # Initialization of the game
+        if headless:  # Run without a window or audio device (batch simulation, tooling)
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'  # Offscreen video driver
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'  # Silent audio driver
+        self.headless = headless  # Remember whether a real window exists
+
         pygame.init()  # Initialize pygame modules
 
         pygame.display.set_caption('The Assassin')  # Set window title
         self.screen = pygame.display.set_mode((640, 480))  # Create main screen window with size 640x480
         self.display = pygame.Surface((320, 240), pygame.SRCALPHA)  # Create smaller surface for rendering with alpha
         self.display_2 = pygame.Surface((320, 240))  # Create another surface for layered rendering
+        self.upscaled = pygame.Surface(self.screen.get_size(), 0, self.display_2)  # Reused target of the final upscale
+        
+        self.quality = QualityGovernor(quality, adaptive=adaptive)  # Effect density and render settings, adjusted to the frame time
+        
+        self.rng = RandomService(seed)  # Independent seeded random streams for AI, effects, spawners and the screen
 
         self.clock = pygame.time.Clock()  # Create clock to control FPS
         
@@ -48,39 +73,41 @@ class Game:  # Main game class
             'projectile': load_image('projectile.png'),  # Projectile image
         }
         
-        # Load sound effects into a dictionary
-        self.sfx = {
-            'jump': pygame.mixer.Sound('data/sfx/jump.wav'),  # Jump sound effect
-            'dash': pygame.mixer.Sound('data/sfx/dash.wav'),  # Dash sound effect
-            'hit': pygame.mixer.Sound('data/sfx/hit.wav'),  # Hit sound effect
-            'shoot': pygame.mixer.Sound('data/sfx/shoot.wav'),  # Shoot sound effect
-            'ambience': pygame.mixer.Sound('data/sfx/ambience.wav'),  # Ambient background sound
-        }
+        # Preload sound effects into a pooled audio manager (volume, simultaneous voice limit, priority for culling)
+        self.audio = AudioManager(channels=16, enabled=not headless)
+        self.audio.load('ambience', 'data/sfx/ambience.wav', volume=0.2, limit=1, priority=10)  # Ambient background loop, never culled
+        self.audio.load('hit', 'data/sfx/hit.wav', volume=0.8, limit=3, priority=3)  # Hit sound effect
+        self.audio.load('jump', 'data/sfx/jump.wav', volume=0.7, limit=1, priority=2)  # Jump sound effect
+        self.audio.load('dash', 'data/sfx/dash.wav', volume=0.3, limit=1, priority=2)  # Dash sound effect
+        self.audio.load('shoot', 'data/sfx/shoot.wav', volume=0.4, limit=4, priority=1)  # Shooting sound effect
         
-        # Set volume levels for each sound effect
-        self.sfx['ambience'].set_volume(0.2)  # Ambient sound volume
-        self.sfx['shoot'].set_volume(0.4)  # Shooting sound volume
-        self.sfx['hit'].set_volume(0.8)  # Hit sound volume
-        self.sfx['dash'].set_volume(0.3)  # Dash sound volume
-        self.sfx['jump'].set_volume(0.7)  # Jump sound volume
-        
-        self.clouds = Clouds(self.assets['clouds'], count=16)  # Create clouds effect with 16 cloud sprites
+        self.background = ParallaxLayer(self.assets['background'], depth=0, wrap=False)  # Static backdrop, one blit per frame
+        self.clouds = Clouds(self.assets['clouds'], self.rng.vfx, count=16, view_size=self.display.get_size())  # 16 clouds baked into a few parallax strips
         
         self.player = Player(self, (50, 50), (8, 15))  # Create player object at position (50, 50) with size (8, 15)
         
         self.tilemap = Tilemap(self, tile_size=16)  # Create tilemap to manage level tiles with 16x16 tiles
         
+        self.ai = AIScheduler(budget=4)  # Enemy decisions are spread over ticks, at most 4 per tick
+        
+        if gc_mode is None:  # Headless tools reload levels constantly, a full collection on each would dominate their frame costs
+            gc_mode = 'auto' if headless else 'freeze'
+        self.memory = MemoryManager(gc_mode, report=alloc_report)  # Garbage collector control and allocation report
+        
         self.level = 0  # Starting level index
         self.load_level(self.level)  # Load level 0
         
         self.screenshake = 0  # Initialize screen shake effect amount
         
+        self.running = False  # Whether the simulation thread should keep ticking
+        
     def load_level(self, map_id):  # Load level data by id (map file)
         self.tilemap.load('data/maps/' + str(map_id) + '.json')  # Load the map json file
         
         self.leaf_spawners = []  # List of areas that spawn leaf particles
         for tree in self.tilemap.extract([('large_decor', 2)], keep=True):  # Extract large decor tiles matching criteria
             self.leaf_spawners.append(pygame.Rect(4 + tree['pos'][0], 4 + tree['pos'][1], 23, 13))  # Create rect for leaf spawn area
+        self.leaf_areas = np.array([rect.width * rect.height for rect in self.leaf_spawners], dtype=float)  # Spawn weight of each area
             
         self.enemies = []  # List of enemy objects
         for spawner in self.tilemap.extract([('spawners', 0), ('spawners', 1)]):  # Extract spawner tiles for player/enemies
@@ -98,142 +125,299 @@ class Game:  # Main game class
         self.dead = 0  # Player death count or flag
         self.transition = -30  # Transition timer/flag for level change
         
-    def run(self):  # Main game loop to run the game
-        pygame.mixer.music.load('data/music.wav')  # Load background music
-        pygame.mixer.music.set_volume(0.5)  # Set music volume
-        pygame.mixer.music.play(-1)  # Play music in a loop
+        self.memory.level_loaded()  # Level data is long lived, keep the collector from rescanning it
         
-        self.sfx['ambience'].play(-1)  # Play ambient sound effect in a loop
+    def restart(self, map_id):  # Start a level from a clean slate, nothing carried over from a previous run (tools reusing one Game)
+        self.level = map_id
+        self.movement = [False, False]
+        self.player = Player(self, (50, 50), (8, 15))  # Fresh velocity, jumps, dash, action and collisions
+        self.ai = AIScheduler(self.ai.budget, self.ai.mode)  # Fresh tick and cursor, before the enemies are created
+        self.load_level(map_id)
+        self.screenshake = 0
         
-        while True:  # Game loop iteration
-            self.display.fill((0, 0, 0, 0))  # Clear the display surface with transparent black
-            self.display_2.blit(self.assets['background'], (0, 0))  # Draw the background onto display_2
-            
-            self.screenshake = max(0, self.screenshake - 1)  # Decrease screen shake effect over time
-            
-            if not len(self.enemies):  # If all enemies defeated
-                self.transition += 1  # Increase transition timer
-                if self.transition > 30:  # After delay
-                    self.level = min(self.level + 1, len(os.listdir('data/maps')) - 1)  # Move to next level or last map
-                    self.load_level(self.level)  # Load new level
-            if self.transition < 0:  # If during transition start delay
-                self.transition += 1  # Increment transition
-            
-            if self.dead:  # If player is dead
-                self.dead += 1  # Increment dead timer
-                if self.dead >= 10:
-                    self.transition = min(30, self.transition + 1)  # Start transition in after death
-                if self.dead > 40:
-                    self.load_level(self.level)  # Reload current level
-            
-            # Smoothly scroll camera to player position
-            self.scroll[0] += (self.player.rect().centerx - self.display.get_width() / 2 - self.scroll[0]) / 30
-            self.scroll[1] += (self.player.rect().centery - self.display.get_height() / 2 - self.scroll[1]) / 30
-            render_scroll = (int(self.scroll[0]), int(self.scroll[1]))  # Integer scroll offset for rendering
-            
-            # Spawn leaf particles randomly within leaf spawner rectangles
-            for rect in self.leaf_spawners:
-                if random.random() * 49999 < rect.width * rect.height:
-                    pos = (rect.x + random.random() * rect.width, rect.y + random.random() * rect.height)  # Random position inside spawner
-                    self.particles.append(Particle(self, 'leaf', pos, velocity=[-0.1, 0.3], frame=random.randint(0, 20)))
-            
-            self.clouds.update()  # Update cloud positions
-            self.clouds.render(self.display_2, offset=render_scroll)  # Render clouds with scrolling offset
-            
-            self.tilemap.render(self.display, offset=render_scroll)  # Render tiles on display surface
-
-            # Update and render enemies, remove them if killed
+    def update(self):  # Advance the simulation by one tick
+        self.screenshake = max(0, self.screenshake - 1)  # Decrease screen shake effect over time
+        
+        if not len(self.enemies):  # If all enemies defeated
+            self.transition += 1  # Increase transition timer
+            if self.transition > 30:  # After delay
+                self.level = min(self.level + 1, len(os.listdir('data/maps')) - 1)  # Move to next level or last map
+                self.load_level(self.level)  # Load new level
+        if self.transition < 0:  # If during transition start delay
+            self.transition += 1  # Increment transition
+        
+        if self.dead:  # If player is dead
+            self.dead += 1  # Increment dead timer
+            if self.dead >= 10:
+                self.transition = min(30, self.transition + 1)  # Start transition in after death
+            if self.dead > 40:
+                self.load_level(self.level)  # Reload current level
+        
+        self.follow_camera()
+        
+        self.spawn_leaves()
+        
+        with self.memory.section('clouds'):
+            self.clouds.update()  # Drift the cloud layers
+        
+        with self.memory.section('ai'):
+            self.ai.update(self.enemies, self.tilemap, self.player)  # Let a few enemies make their decisions this tick
+        
+        with self.memory.section('enemies'):
+            # Update enemies, remove them if killed
             for enemy in self.enemies.copy():
                 kill = enemy.update(self.tilemap, (0, 0))
-                enemy.render(self.display, offset=render_scroll)
                 if kill:
                     self.enemies.remove(enemy)
-            
+        
+        with self.memory.section('player'):
             if not self.dead:  # If player is alive
                 self.player.update(self.tilemap, (self.movement[1] - self.movement[0], 0))  # Update player movement input
-                self.player.render(self.display, offset=render_scroll)  # Render player
-            
-            # For each projectile, update position, check collisions, and render
+        
+        with self.memory.section('projectiles'):
+            # For each projectile, update position and check collisions
             for projectile in self.projectiles.copy():
                 projectile[0][0] += projectile[1]  # Move projectile horizontally
                 projectile[2] += 1  # Increment projectile timer
-                img = self.assets['projectile']  # Get projectile image
-                self.display.blit(img, (projectile[0][0] - img.get_width() / 2 - render_scroll[0], projectile[0][1] - img.get_height() / 2 - render_scroll[1]))  # Render projectile
-                
+            
                 if self.tilemap.solid_check(projectile[0]):  # Check if projectile hits solid tile
                     self.projectiles.remove(projectile)  # Remove projectile
                     for i in range(4):  # Create sparks on impact
-                        self.sparks.append(Spark(projectile[0], random.random() - 0.5 + (math.pi if projectile[1] > 0 else 0), 2 + random.random()))
+                        self.add_spark(Spark(projectile[0], self.rng.vfx.random() - 0.5 + (math.pi if projectile[1] > 0 else 0), 2 + self.rng.vfx.random()))
                 elif projectile[2] > 360:  # Remove projectile if too old
                     self.projectiles.remove(projectile)
                 elif abs(self.player.dashing) < 50:  # Check collision with player if not dashing strongly
                     if self.player.rect().collidepoint(projectile[0]):  # If projectile hits player
                         self.projectiles.remove(projectile)  # Remove projectile
                         self.dead += 1  # Increase death counter
-                        self.sfx['hit'].play()  # Play hit sound
+                        self.audio.play('hit')  # Play hit sound
                         self.screenshake = max(16, self.screenshake)  # Trigger screen shake effect
-                        for i in range(30):  # Create sparks and particles on player hit
-                            angle = random.random() * math.pi * 2
-                            speed = random.random() * 5
-                            self.sparks.append(Spark(self.player.rect().center, angle, 2 + random.random()))
-                            self.particles.append(Particle(self, 'particle', self.player.rect().center, velocity=[math.cos(angle + math.pi) * speed * 0.5, math.sin(angle + math.pi) * speed * 0.5], frame=random.randint(0, 7)))
-                        
-            # Update and render sparks; remove them if finished
+                        self.burst(self.player.rect().center, 30)  # Create sparks and particles on player hit
+        
+        self.update_effects()
+        
+        self.memory.frame(quiet=self.transition != 0)  # Collections happen here, at the end of a tick, or during transitions
+                
+    def follow_camera(self):  # Ease the camera towards the player
+        self.scroll[0] += (self.player.rect().centerx - self.display.get_width() / 2 - self.scroll[0]) / 30
+        self.scroll[1] += (self.player.rect().centery - self.display.get_height() / 2 - self.scroll[1]) / 30
+        
+    def spawn_leaves(self):  # Ambient leaves falling from the trees
+        with self.memory.section('leaves'):
+            # Spawn leaf particles randomly within leaf spawner rectangles, one vectorized roll covers every spawner
+            rolls = self.rng.spawning.uniforms(len(self.leaf_spawners)) * 49999
+            for i in np.flatnonzero(rolls < self.leaf_areas * self.quality.settings['leaves']).tolist():
+                rect = self.leaf_spawners[i]
+                x, y, frame = self.rng.spawning.randoms(3)
+                pos = (rect.x + x * rect.width, rect.y + y * rect.height)  # Random position inside spawner
+                self.add_particle(Particle(self, 'leaf', pos, velocity=[-0.1, 0.3], frame=int(frame * 21)))
+        
+    def update_effects(self):  # Advance sparks and particles, dropping finished ones
+        with self.memory.section('sparks'):
+            # Update sparks; remove them if finished
             for spark in self.sparks.copy():
                 kill = spark.update()
-                spark.render(self.display, offset=render_scroll)
                 if kill:
                     self.sparks.remove(spark)
-                    
-            # Create a silhouette mask effect around the display for shading
-            display_mask = pygame.mask.from_surface(self.display)
-            display_sillhouette = display_mask.to_surface(setcolor=(0, 0, 0, 180), unsetcolor=(0, 0, 0, 0))
-            for offset in [(-1, 0), (1, 0), (0, -1), (0, 1)]:  # Draw shadow offsets around edges
-                self.display_2.blit(display_sillhouette, offset)
-            
-            # Update and render particles; leaves slightly sway side to side
+        
+        with self.memory.section('particles'):
+            # Update particles; leaves slightly sway side to side
             for particle in self.particles.copy():
                 kill = particle.update()
-                particle.render(self.display, offset=render_scroll)
                 if particle.type == 'leaf':
                     particle.pos[0] += math.sin(particle.animation.frame * 0.035) * 0.3  # Sway leaves
                 if kill:
                     self.particles.remove(particle)
+        
+    def add_spark(self, spark):  # Spawn a spark unless the quality cap is reached
+        if len(self.sparks) < self.quality.settings['sparks']:
+            self.sparks.append(spark)
+        
+    def add_particle(self, particle):  # Spawn a particle unless the quality cap is reached
+        if len(self.particles) < self.quality.settings['particles']:
+            self.particles.append(particle)
+        
+    def burst(self, pos, count):  # Hit effect: sparks flying out, particles thrown the opposite way, thinned out at lower quality
+        values = self.rng.vfx.randoms(self.quality.density(count) * 4)  # Angle, speed, spark speed and frame of every piece at once
+        for i in range(0, len(values), 4):
+            angle = values[i] * math.pi * 2
+            speed = values[i + 1] * 5
+            self.add_spark(Spark(pos, angle, 2 + values[i + 2]))
+            self.add_particle(Particle(self, 'particle', pos, velocity=[math.cos(angle + math.pi) * speed * 0.5, math.sin(angle + math.pi) * speed * 0.5], frame=int(values[i + 3] * 8)))
+        
+    def snapshot(self, keyed=True):  # Capture an immutable description of everything drawn this tick
+        render_scroll = (int(self.scroll[0]), int(self.scroll[1]))  # Integer scroll offset for rendering
+        margin = self.tilemap.tile_size if keyed else 0  # Extra border so interpolated scrolling never exposes missing tiles
+        view_size = (self.display.get_width() + margin * 2, self.display.get_height() + margin * 2)
+        view_offset = (render_scroll[0] - margin, render_scroll[1] - margin)
+        
+        # Every drawable submits here, sorted by layer and culled to the view. Unkeyed, for drawing straight away:
+        # no interpolation keys, and blits are kept in display space as submitted
+        queue = RenderQueue(self.display.get_size(), keyed=keyed)
+        for layer in [self.background] + self.clouds.layers:  # Parallax layers are recorded in screen space
+            queue.begin(id(layer), LAYER_BACKGROUND)
+            layer.render(queue, offset=render_scroll)
+        
+        queue.target(view_size, view_offset)  # Everything else is recorded in world space (display space when unkeyed)
+        queue.begin(None, LAYER_TILES)  # Tiles are static, so they are recorded without a key
+        self.tilemap.render(queue, offset=view_offset)
+        for enemy in self.enemies:
+            queue.begin(id(enemy), LAYER_ENEMIES)
+            enemy.render(queue, offset=view_offset)
+        if not self.dead:  # If player is alive
+            queue.begin(id(self.player), LAYER_PLAYER)
+            self.player.render(queue, offset=view_offset)
+        img = self.assets['projectile']  # Get projectile image
+        for projectile in self.projectiles:
+            queue.begin(id(projectile), LAYER_PROJECTILES)
+            queue.blit(img, (projectile[0][0] - img.get_width() / 2 - view_offset[0], projectile[0][1] - img.get_height() / 2 - view_offset[1]))
+        for particle in self.particles:  # Particles are drawn on top of the outline
+            queue.begin(id(particle), LAYER_PARTICLES)
+            particle.render(queue, offset=view_offset)
+        
+        if keyed:
+            sparks = [(id(spark), Spark(spark.pos, spark.angle, spark.speed), spark.pos[0], spark.pos[1]) for spark in self.sparks]
+        else:
+            sparks = [(None, spark, spark.pos[0], spark.pos[1]) for spark in self.sparks]  # Drawn before the simulation moves them, no copy needed
+        
+        return FrameSnapshot(tuple(self.scroll), self.screenshake, self.transition, queue.finish(), sparks)
+    
+    def render(self, snapshot=None, previous=None, alpha=1.0):  # Draw a snapshot, interpolated from the previous one
+        if snapshot is None:  # Live state: nothing to interpolate, drawn as recorded in display space
+            snapshot = self.snapshot(keyed=False)
+            render_scroll = (int(snapshot.scroll[0]), int(snapshot.scroll[1]))
+            entries, sparks, world_offset = snapshot.entries, snapshot.sparks, (0, 0)
+        else:
+            if previous is None:
+                previous = snapshot
+            scroll = lerp_scroll(previous, snapshot, alpha)
+            render_scroll = (int(scroll[0]), int(scroll[1]))  # Integer scroll offset for rendering
+            entries = interpolate(previous.entries, snapshot.entries, alpha)
+            sparks = interpolate(previous.sparks, snapshot.sparks, alpha)
+            world_offset = render_scroll
+        
+        self.display.fill((0, 0, 0, 0))  # Clear the display surface with transparent black
+        draw(self.display_2, entries, layers=BACKGROUND_LAYERS)  # Background and cloud layers
+        draw(self.display, entries, offset=world_offset, layers=WORLD_LAYERS)  # Tiles, entities and projectiles
+        
+        for key, spark, x, y in sparks:  # Render sparks
+            spark.render(self.display, offset=(render_scroll[0] - (x - spark.pos[0]), render_scroll[1] - (y - spark.pos[1])))
+                
+        if self.quality.settings['outline']:  # Create a silhouette mask effect around the display for shading
+            display_mask = pygame.mask.from_surface(self.display)
+            display_sillhouette = display_mask.to_surface(setcolor=(0, 0, 0, 180), unsetcolor=(0, 0, 0, 0))
+            for offset in [(-1, 0), (1, 0), (0, -1), (0, 1)]:  # Draw shadow offsets around edges
+                self.display_2.blit(display_sillhouette, offset)
+        
+        draw(self.display, entries, offset=world_offset, layers=OVERLAY_LAYERS)  # Particles on top of the silhouette
+                    
+        if snapshot.transition:  # If transitioning between levels
+            transition_surf = pygame.Surface(self.display.get_size())  # Create a surface same size as game display
+            pygame.draw.circle(transition_surf, (255, 255, 255), (self.display.get_width() // 2, self.display.get_height() // 2), (30 - abs(snapshot.transition)) * 8)  # Draw circle to reveal next level
+            transition_surf.set_colorkey((255, 255, 255))  # Set white as transparent color key
+            self.display.blit(transition_surf, (0, 0))  # Draw transition mask on display
             
-            # Handle pygame events such as keyboard and window close
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:  # If window close button clicked
-                    pygame.quit()  # Quit pygame
-                    sys.exit()  # Exit program
-                if event.type == pygame.KEYDOWN:  # Key pressed down
-                    if event.key == pygame.K_LEFT:  # Left arrow key pressed
-                        self.movement[0] = True  # Set left movement flag
-                    if event.key == pygame.K_RIGHT:  # Right arrow key pressed
-                        self.movement[1] = True  # Set right movement flag
-                    if event.key == pygame.K_UP:  # Up arrow pressed
-                        if self.player.jump():  # Attempt to jump
-                            self.sfx['jump'].play()  # Play jump sound
-                    if event.key == pygame.K_x:  # 'x' key pressed
+        self.display_2.blit(self.display, (0, 0))  # Blit the game display surface on top of display_2
+        
+        # Calculate screen shake offset randomly within shake magnitude
+        screenshake = snapshot.screenshake
+        screenshake_offset = (self.rng.screen.random() * screenshake - screenshake / 2, self.rng.screen.random() * screenshake - screenshake / 2)
+        # Scale display_2 up into a reused surface, then blit it to main screen with screenshake offset
+        if self.quality.settings['upscale'] == 'scale2x':  # Smooths diagonal pixel edges, window is exactly twice the size
+            pygame.transform.scale2x(self.display_2, self.upscaled)
+        else:
+            pygame.transform.scale(self.display_2, self.upscaled.get_size(), self.upscaled)
+        self.screen.blit(self.upscaled, screenshake_offset)
+        
+    def handle_events(self, commands=None):  # Process window and keyboard events
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:  # If window close button clicked
+                self.running = False  # Stop the simulation thread
+                pygame.quit()  # Quit pygame
+                sys.exit()  # Exit program
+            if event.type == pygame.KEYDOWN:  # Key pressed down
+                if event.key == pygame.K_LEFT:  # Left arrow key pressed
+                    self.movement[0] = True  # Set left movement flag
+                if event.key == pygame.K_RIGHT:  # Right arrow key pressed
+                    self.movement[1] = True  # Set right movement flag
+                if event.key == pygame.K_UP:  # Up arrow pressed
+                    if commands:
+                        commands.put('jump')  # Jump on the simulation thread
+                    elif self.player.jump():  # Attempt to jump
+                        self.audio.play('jump')  # Play jump sound
+                if event.key == pygame.K_x:  # 'x' key pressed
+                    if commands:
+                        commands.put('dash')  # Dash on the simulation thread
+                    else:
                         self.player.dash()  # Player dash action
-                if event.type == pygame.KEYUP:  # Key released
-                    if event.key == pygame.K_LEFT:  # Left arrow released
-                        self.movement[0] = False  # Clear left movement flag
-                    if event.key == pygame.K_RIGHT:  # Right arrow released
-                        self.movement[1] = False  # Clear right movement flag
-                        
-            if self.transition:  # If transitioning between levels
-                transition_surf = pygame.Surface(self.display.get_size())  # Create a surface same size as game display
-                pygame.draw.circle(transition_surf, (255, 255, 255), (self.display.get_width() // 2, self.display.get_height() // 2), (30 - abs(self.transition)) * 8)  # Draw circle to reveal next level
-                transition_surf.set_colorkey((255, 255, 255))  # Set white as transparent color key
-                self.display.blit(transition_surf, (0, 0))  # Draw transition mask on display
-                
-            self.display_2.blit(self.display, (0, 0))  # Blit the game display surface on top of display_2
+            if event.type == pygame.KEYUP:  # Key released
+                if event.key == pygame.K_LEFT:  # Left arrow released
+                    self.movement[0] = False  # Clear left movement flag
+                if event.key == pygame.K_RIGHT:  # Right arrow released
+                    self.movement[1] = False  # Clear right movement flag
+                    
+    def simulate(self, commands):  # Simulation thread: fixed rate ticks publishing frame snapshots
+        tick = 1 / TICK_RATE
+        next_tick = time.perf_counter()
+        while self.running:
+            while not commands.empty():  # Apply input commands queued by the render thread
+                command = commands.get()
+                if command == 'jump':
+                    if self.player.jump():  # Attempt to jump
+                        self.audio.play('jump')  # Play jump sound
+                if command == 'dash':
+                    self.player.dash()  # Player dash action
             
-            # Calculate screen shake offset randomly within shake magnitude
-            screenshake_offset = (random.random() * self.screenshake - self.screenshake / 2, random.random() * self.screenshake - self.screenshake / 2)
-            # Blit the final scaled display_2 surface to main screen with screenshake offset
-            self.screen.blit(pygame.transform.scale(self.display_2, self.screen.get_size()), screenshake_offset)
+            self.update()  # Advance the simulation
+            with self.memory.section('snapshot'):
+                self.frames = (self.frames[1], self.snapshot(), time.perf_counter())  # Publish (previous, current, tick time)
+            
+            next_tick += tick
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -tick * 15:  # Too far behind (e.g. window dragged), drop the backlog instead of catching up
+                next_tick = time.perf_counter()
+        
+    def run(self, threaded=False, fps=60):  # Main game loop to run the game
+        self.audio.play_music('data/music.wav', volume=0.5)  # Stream background music in a loop
+        
+        self.audio.play('ambience', loops=-1)  # Play ambient sound effect in a loop
+        
+        if not threaded:
+            while True:  # Game loop iteration
+                self.update()  # Advance the simulation
+                with self.memory.section('render'):
+                    self.render()  # Draw the frame
+                self.handle_events()  # Handle pygame events such as keyboard and window close
+                pygame.display.update()  # Update the full display Surface to the screen
+                self.clock.tick(60)  # Keep the game running at 60 frames per second
+                self.quality.frame(self.clock.get_rawtime())  # Time spent working this frame, without the wait
+        
+        # Simulation runs on its own thread at a fixed tick, rendering consumes its snapshots at any frame rate
+        commands = queue.Queue()
+        self.running = True
+        self.frames = (None, self.snapshot(), time.perf_counter())
+        threading.Thread(target=self.simulate, args=(commands,), daemon=True).start()
+        
+        while True:
+            self.handle_events(commands)
+            previous, current, stamp = self.frames
+            alpha = min(1.0, (time.perf_counter() - stamp) * TICK_RATE)  # Fraction of the next tick already elapsed
+            with self.memory.section('render'):  # Shares the counters with the simulation thread, run unthreaded for exact figures
+                self.render(current, previous or current, alpha)
             pygame.display.update()  # Update the full display Surface to the screen
-            self.clock.tick(60)  # Keep the game running at 60 frames per second
+            self.clock.tick(fps)  # Render frame rate cap (0 = uncapped)
+            self.quality.frame(self.clock.get_rawtime())  # Time spent rendering this frame, without the wait
 
-Game().run()  # Create a Game instance and start running it
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='The Assassin')
+    parser.add_argument('--threaded', action='store_true', help='simulate on a separate thread and interpolate rendering')
+    parser.add_argument('--fps', type=int, default=60, help='render frame rate cap in threaded mode (0 = uncapped)')
+    parser.add_argument('--gc', choices=GC_MODES, default='freeze', help='garbage collector mode: auto (stock), freeze (level data frozen after loading), manual (collect only between frames and during transitions)')
+    parser.add_argument('--alloc-report', action='store_true', help='print a tracemalloc allocation report by subsystem every few seconds')
+    parser.add_argument('--quality', choices=['auto'] + QUALITY_LEVELS, default='auto', help='effect and render quality preset, auto starts at high and adapts to the frame time')
+    parser.add_argument('--seed', type=int, default=None, help='seed for every random stream, for reproducible runs')
+    args = parser.parse_args()
+    quality = 'high' if args.quality == 'auto' else args.quality
+    Game(gc_mode=args.gc, alloc_report=args.alloc_report, quality=quality, adaptive=args.quality == 'auto', seed=args.seed).run(threaded=args.threaded, fps=args.fps)  # Create a Game instance and start running it
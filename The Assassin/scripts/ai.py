@@ -0,0 +1,49 @@
+import heapq
+
+# Behaviour tuning per entity type. Chances are per tick and get compounded over the ticks between decisions.
+AI_PROFILES = {
+    'enemy': {
+        'walk_chance': 0.01,  # Chance per tick to start walking while idle
+        'walk_time': (30, 120),  # Walk duration range, in ticks
+        'sight': 16,  # Vertical distance within which the player can be shot
+        'lookahead': 4,  # Tiles of ground probed ahead per decision
+        'weight': 1.0,  # Scheduling priority multiplier
+    },
+}
+
+class AIScheduler:
+    def __init__(self, budget=4, mode='distance'):
+        self.budget = budget
+        self.mode = mode
+        self.tick = 0
+        self.cursor = 0
+
+    def update(self, agents, tilemap, target):
+        self.tick += 1
+        if not agents:
+            return
+
+        # Agents that cannot continue without a decision (walk over, ledge reached, wall hit) go first
+        chosen = [agent for agent in agents if agent.needs_decision]
+        if len(chosen) > self.budget:
+            chosen = heapq.nsmallest(self.budget, chosen, key=lambda agent: agent.ai_tick)
+        budget = self.budget - len(chosen)
+
+        if budget > 0:
+            if self.mode == 'round_robin':
+                for i in range(min(budget, len(agents))):
+                    agent = agents[(self.cursor + i) % len(agents)]
+                    if not agent.needs_decision:
+                        chosen.append(agent)
+                self.cursor = (self.cursor + budget) % len(agents)
+            else:
+                # Stale agents close to the target are refreshed most often, far away ones still get a turn eventually
+                def priority(agent):
+                    dist = abs(agent.pos[0] - target.pos[0]) + abs(agent.pos[1] - target.pos[1])
+                    return (self.tick - agent.ai_tick) * agent.ai_profile['weight'] / (1 + dist / 64)
+                chosen += heapq.nlargest(budget, (agent for agent in agents if not agent.needs_decision), key=priority)
+
+        for agent in chosen:
+            agent.think(tilemap, target, self.tick - agent.ai_tick)
+            agent.ai_tick = self.tick
+            agent.needs_decision = False
@@ -0,0 +1,186 @@
+import math
+from collections import OrderedDict
+
+import pygame
+
+CHUNK_TILES = 16
+MIP_LEVELS = 4
+BUILD_BUDGET = 8
+CACHE_CHUNKS = 256  # Chunks kept, least recently drawn ones are dropped beyond that
+EMPTY = ()  # Cached in place of the mips of a chunk without any tiles
+MINIMAP_SIZE = (80, 60)
+MINIMAP_PADDING = 4
+
+class ChunkCache:
+    def __init__(self, tilemap, assets, chunk_tiles=CHUNK_TILES, levels=MIP_LEVELS, build_budget=BUILD_BUDGET, max_chunks=CACHE_CHUNKS):
+        self.tilemap = tilemap
+        self.assets = assets
+        self.chunk_tiles = chunk_tiles
+        self.levels = levels
+        self.build_budget = build_budget
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()
+        self.offgrid = None
+        self.builds = 0
+
+        tile_size = tilemap.tile_size
+        self.chunk_size = chunk_tiles * tile_size
+        # Largest asset, so tiles that overflow their cell are drawn into (and invalidate) every chunk they touch
+        self.overflow = max(max(img.get_width(), img.get_height()) for variants in assets.values() for img in variants)
+        self.margin = (self.overflow - 1) // tile_size
+
+        self.minimap = Minimap(tilemap, assets)
+
+    def chunk_range(self, rect):
+        return (rect[0] // self.chunk_size, rect[1] // self.chunk_size, (rect[0] + rect[2] - 1) // self.chunk_size, (rect[1] + rect[3] - 1) // self.chunk_size)
+
+    def invalidate(self, rect):
+        x1, y1, x2, y2 = self.chunk_range(rect)
+        for cx in range(x1, x2 + 1):
+            for cy in range(y1, y2 + 1):
+                self.chunks.pop((cx, cy), None)
+
+    def tile_changed(self, loc):
+        x, y = (int(v) for v in loc.split(';'))
+        tile_size = self.tilemap.tile_size
+        self.invalidate((x * tile_size, y * tile_size, self.overflow, self.overflow))
+        self.minimap.tile_changed(x, y)
+
+    def offgrid_changed(self, tile):
+        self.invalidate((math.floor(tile['pos'][0]), math.floor(tile['pos'][1]), self.overflow + 1, self.overflow + 1))
+        self.offgrid = None
+
+    def index_offgrid(self):
+        self.offgrid = {}
+        for tile in self.tilemap.offgrid_tiles:
+            img = self.assets[tile['type']][tile['variant']]
+            x1, y1, x2, y2 = self.chunk_range((math.floor(tile['pos'][0]), math.floor(tile['pos'][1]), img.get_width(), img.get_height()))
+            for cx in range(x1, x2 + 1):
+                for cy in range(y1, y2 + 1):
+                    self.offgrid.setdefault((cx, cy), []).append(tile)
+
+    def grid_range(self, chunk):
+        # Tiles that can reach into the chunk, including ones overflowing from up to margin cells above and left
+        first = (chunk[0] * self.chunk_tiles - self.margin, chunk[1] * self.chunk_tiles - self.margin)
+        return range(first[0], (chunk[0] + 1) * self.chunk_tiles), range(first[1], (chunk[1] + 1) * self.chunk_tiles)
+
+    def occupied(self, chunk):
+        if self.offgrid is None:
+            self.index_offgrid()
+        if chunk in self.offgrid:
+            return True
+        tiles = self.tilemap.tilemap
+        xs, ys = self.grid_range(chunk)
+        return any(str(x) + ';' + str(y) in tiles for x in xs for y in ys)
+
+    def build(self, chunk):
+        if self.offgrid is None:
+            self.index_offgrid()
+        tile_size = self.tilemap.tile_size
+        origin = (chunk[0] * self.chunk_size, chunk[1] * self.chunk_size)
+        surf = pygame.Surface((self.chunk_size, self.chunk_size)).convert()
+
+        for tile in self.offgrid.get(chunk, []):
+            # Floor in world space so a tile straddling chunks lands on the same pixel in each of them
+            surf.blit(self.assets[tile['type']][tile['variant']], (math.floor(tile['pos'][0]) - origin[0], math.floor(tile['pos'][1]) - origin[1]))
+
+        tiles = self.tilemap.tilemap
+        xs, ys = self.grid_range(chunk)
+        for x in xs:
+            for y in ys:
+                loc = str(x) + ';' + str(y)
+                if loc in tiles:
+                    tile = tiles[loc]
+                    surf.blit(self.assets[tile['type']][tile['variant']], (tile['pos'][0] * tile_size - origin[0], tile['pos'][1] * tile_size - origin[1]))
+        return surf
+
+    def get(self, chunk, level):
+        mips = self.chunks.get(chunk)
+        if mips is None or (mips is not EMPTY and all(mip is None for mip in mips[:level + 1])):  # Never built, or only kept zoomed out further
+            if not self.occupied(chunk):
+                mips = EMPTY  # Nothing to draw, no surface needed
+            elif self.builds >= self.build_budget:
+                return None
+            else:
+                self.builds += 1
+                mips = [self.build(chunk)] + [None] * (self.levels - 1)
+            self.chunks[chunk] = mips
+            while len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
+        self.chunks.move_to_end(chunk)
+        if mips is EMPTY:
+            return None
+        for i in range(1, level + 1):
+            if mips[i] is None and mips[i - 1] is not None:
+                size = self.chunk_size >> i
+                mips[i] = pygame.transform.smoothscale(mips[i - 1], (size, size))
+        for i in range(level):
+            mips[i] = None  # Only the level on screen is kept, zooming back in rebuilds the chunk
+        return mips[level]
+
+    def render(self, surf, offset=(0, 0), level=0):
+        self.builds = 0  # Chunks built this frame, the rest fill in over the next frames
+        zoom = 1 / (1 << level)
+        view = (offset[0], offset[1], int(surf.get_width() / zoom) + 1, int(surf.get_height() / zoom) + 1)
+        x1, y1, x2, y2 = self.chunk_range(view)
+        blits = []
+        for cx in range(x1, x2 + 1):
+            for cy in range(y1, y2 + 1):
+                img = self.get((cx, cy), level)
+                if img:
+                    blits.append((img, ((cx * self.chunk_size - offset[0]) * zoom, (cy * self.chunk_size - offset[1]) * zoom)))
+        surf.blits(blits, doreturn=False)
+
+class Minimap:
+    def __init__(self, tilemap, assets, size=MINIMAP_SIZE):
+        self.tilemap = tilemap
+        self.size = size
+        self.colors = {}
+        for tile_type, variants in assets.items():
+            self.colors[tile_type] = [pygame.transform.average_color(img) for img in variants]
+        self.bounds = None
+        self.pixels = None
+        self.surf = None
+
+    def rebuild(self):
+        tiles = self.tilemap.tilemap
+        if not tiles:
+            self.bounds = (0, 0, 1, 1)
+        else:
+            xs = [tile['pos'][0] for tile in tiles.values()]
+            ys = [tile['pos'][1] for tile in tiles.values()]
+            # Padded so painting just past the edge of the map does not force a rebuild every frame
+            self.bounds = (min(xs) - MINIMAP_PADDING, min(ys) - MINIMAP_PADDING, max(xs) - min(xs) + 1 + MINIMAP_PADDING * 2, max(ys) - min(ys) + 1 + MINIMAP_PADDING * 2)
+        # One pixel per tile, edits update single pixels and only the final scale is redone
+        self.pixels = pygame.Surface(self.bounds[2:]).convert()
+        for tile in tiles.values():
+            self.pixels.set_at((tile['pos'][0] - self.bounds[0], tile['pos'][1] - self.bounds[1]), self.colors[tile['type']][tile['variant']])
+        self.surf = None
+
+    def tile_changed(self, x, y):
+        if self.pixels is None:
+            return
+        bounds = self.bounds
+        loc = str(x) + ';' + str(y)
+        tile = self.tilemap.tilemap.get(loc)
+        if not (bounds[0] <= x < bounds[0] + bounds[2] and bounds[1] <= y < bounds[1] + bounds[3]):
+            if tile:
+                self.pixels = None  # Painted outside the known bounds
+            return
+        color = self.colors[tile['type']][tile['variant']] if tile else (0, 0, 0)
+        self.pixels.set_at((x - bounds[0], y - bounds[1]), color)
+        self.surf = None
+
+    def render(self, surf, view, tile_size, pos=None):
+        if self.pixels is None:
+            self.rebuild()
+        bounds = self.bounds
+        scale = min(self.size[0] / bounds[2], self.size[1] / bounds[3])
+        if self.surf is None:
+            self.surf = pygame.transform.scale(self.pixels, (max(1, int(bounds[2] * scale)), max(1, int(bounds[3] * scale))))
+        if pos is None:
+            pos = (surf.get_width() - self.surf.get_width() - 5, 5)
+        surf.blit(self.surf, pos)
+
+        view_rect = pygame.Rect(pos[0] + (view[0] / tile_size - bounds[0]) * scale, pos[1] + (view[1] / tile_size - bounds[1]) * scale, max(1, view[2] / tile_size * scale), max(1, view[3] / tile_size * scale))
+        pygame.draw.rect(surf, (255, 255, 255), view_rect.clip(pygame.Rect(pos, self.surf.get_size())) or pygame.Rect(pos, (1, 1)), 1)
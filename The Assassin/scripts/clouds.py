@@ -1,4 +1,4 @@
-import random
+from scripts.parallax import ParallaxLayer, wrap_strip
 
 class Cloud:
     def __init__(self, pos, img, speed, depth):
@@ -6,27 +6,33 @@ class Cloud:
         self.img = img
         self.speed = speed
         self.depth = depth
-    
-    def update(self):
-        self.pos[0] += self.speed
-        
-    def render(self, surf, offset=(0, 0)):
-        render_pos = (self.pos[0] - offset[0] * self.depth, self.pos[1] - offset[1] * self.depth)
-        surf.blit(self.img, (render_pos[0] % (surf.get_width() + self.img.get_width()) - self.img.get_width(), render_pos[1] % (surf.get_height() + self.img.get_height()) - self.img.get_height()))
-        
+
 class Clouds:
-    def __init__(self, cloud_images, count=16):
-        self.clouds = []
+    def __init__(self, cloud_images, rng, count=16, bands=4, view_size=(320, 240)):
+        clouds = []
         
         for i in range(count):
-            self.clouds.append(Cloud((random.random() * 99999, random.random() * 99999), random.choice(cloud_images), random.random() * 0.05 + 0.05, random.random() * 0.6 + 0.2))
+            x, y, speed, depth = rng.randoms(4)
+            clouds.append(Cloud((x * 99999, y * 99999), rng.choice(cloud_images), speed * 0.05 + 0.05, depth * 0.6 + 0.2))
+        
+        clouds.sort(key=lambda x: x.depth)
         
-        self.clouds.sort(key=lambda x: x.depth)
+        # Clouds of similar depth are baked into one wrap-around strip per band, drawn back to front
+        strip_size = (view_size[0] + max(img.get_width() for img in cloud_images), view_size[1] + max(img.get_height() for img in cloud_images))
+        self.layers = []
+        for band in range(bands):
+            members = clouds[band * count // bands:(band + 1) * count // bands]
+            if not members:
+                continue
+            depth = sum(cloud.depth for cloud in members) / len(members)
+            speed = sum(cloud.speed for cloud in members) / len(members)
+            strip = wrap_strip(strip_size, [(cloud.img, cloud.pos) for cloud in members])
+            self.layers.append(ParallaxLayer(strip, depth=depth, speed=(speed, 0)))
     
     def update(self):
-        for cloud in self.clouds:
-            cloud.update()
+        for layer in self.layers:
+            layer.update()
     
     def render(self, surf, offset=(0, 0)):
-        for cloud in self.clouds:
-            cloud.render(surf, offset=offset)
\ No newline at end of file
+        for layer in self.layers:
+            layer.render(surf, offset=offset)
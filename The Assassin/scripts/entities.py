@@ -1,8 +1,8 @@
 import math
-import random
 
 import pygame
 
+from scripts.ai import AI_PROFILES
 from scripts.particle import Particle
 from scripts.spark import Spark
 
@@ -81,32 +81,74 @@ class Enemy(PhysicsEntity):
         super().__init__(game, 'enemy', pos, size)
         
         self.walking = 0
+        self.ai_profile = AI_PROFILES[self.type]
+        self.ai_tick = game.ai.tick  # Scheduler tick of the last decision
+        self.needs_decision = False  # Set when the enemy cannot carry on without thinking
+        self.pending_shot = False
+        self.ground_ahead = 0  # Pixels that can be walked before the ground has to be probed again
+        self.ledge = False  # Whether the probed ground ends in a ledge rather than running past the lookahead
+        
+    def probe(self, tilemap):
+        # Walk the solid run ahead a few tiles at once instead of checking one point every tick
+        tile_size = tilemap.tile_size
+        lookahead = self.ai_profile['lookahead'] * tile_size
+        x = self.rect().centerx + (-7 if self.flip else 7)
+        step = -1 if self.flip else 1
+        dist = 0
+        while dist < lookahead and tilemap.solid_check((x + step * dist, self.pos[1] + 23)):
+            # Jump to the far edge of the tile holding the probe point
+            edge = (x + step * dist) // tile_size * tile_size + (-1 if self.flip else tile_size)
+            dist = min(lookahead, abs(edge - x))
+        self.ground_ahead = dist
+        self.ledge = dist < lookahead
+        
+    def shoot(self, target):
+        dis = (target.pos[0] - self.pos[0], target.pos[1] - self.pos[1])
+        if (abs(dis[1]) < self.ai_profile['sight']):
+            if (self.flip and dis[0] < 0):
+                self.game.audio.play('shoot')
+                self.game.projectiles.append([[self.rect().centerx - 7, self.rect().centery], -1.5, 0])
+                for i in range(4):
+                    self.game.add_spark(Spark(self.game.projectiles[-1][0], self.game.rng.vfx.random() - 0.5 + math.pi, 2 + self.game.rng.vfx.random()))
+            if (not self.flip and dis[0] > 0):
+                self.game.audio.play('shoot')
+                self.game.projectiles.append([[self.rect().centerx + 7, self.rect().centery], 1.5, 0])
+                for i in range(4):
+                    self.game.add_spark(Spark(self.game.projectiles[-1][0], self.game.rng.vfx.random() - 0.5, 2 + self.game.rng.vfx.random()))
+        
+    def think(self, tilemap, target, elapsed):
+        profile = self.ai_profile
+        if self.pending_shot:
+            self.pending_shot = False
+            self.shoot(target)
+        elif self.walking:
+            if self.ground_ahead <= 0:
+                self.probe(tilemap)
+        # Chance of having started walking at least once over the ticks since the last decision
+        elif self.game.rng.ai.random() < 1 - (1 - profile['walk_chance']) ** elapsed:
+            self.walking = self.game.rng.ai.randint(*profile['walk_time'])
+            self.probe(tilemap)
         
     def update(self, tilemap, movement=(0, 0)):
+        # Per tick work only follows the last decision, the AI scheduler refreshes it in between
         if self.walking:
-            if tilemap.solid_check((self.rect().centerx + (-7 if self.flip else 7), self.pos[1] + 23)):
-                if (self.collisions['right'] or self.collisions['left']):
-                    self.flip = not self.flip
-                else:
-                    movement = (movement[0] - 0.5 if self.flip else 0.5, movement[1])
-            else:
+            if (self.collisions['right'] or self.collisions['left']):
                 self.flip = not self.flip
+                self.ground_ahead = 0
+                self.needs_decision = True
+            elif self.ground_ahead > 0:
+                movement = (movement[0] - 0.5 if self.flip else 0.5, movement[1])
+                self.ground_ahead -= 0.5
+            else:
+                if self.ledge:
+                    self.flip = not self.flip
+                    self.ledge = False
+                self.needs_decision = True
             self.walking = max(0, self.walking - 1)
             if not self.walking:
-                dis = (self.game.player.pos[0] - self.pos[0], self.game.player.pos[1] - self.pos[1])
-                if (abs(dis[1]) < 16):
-                    if (self.flip and dis[0] < 0):
-                        self.game.sfx['shoot'].play()
-                        self.game.projectiles.append([[self.rect().centerx - 7, self.rect().centery], -1.5, 0])
-                        for i in range(4):
-                            self.game.sparks.append(Spark(self.game.projectiles[-1][0], random.random() - 0.5 + math.pi, 2 + random.random()))
-                    if (not self.flip and dis[0] > 0):
-                        self.game.sfx['shoot'].play()
-                        self.game.projectiles.append([[self.rect().centerx + 7, self.rect().centery], 1.5, 0])
-                        for i in range(4):
-                            self.game.sparks.append(Spark(self.game.projectiles[-1][0], random.random() - 0.5, 2 + random.random()))
-        elif random.random() < 0.01:
-            self.walking = random.randint(30, 120)
+                self.ground_ahead = 0
+                self.pending_shot = True
+                self.needs_decision = True
         
         super().update(tilemap, movement=movement)
         
@@ -118,14 +160,10 @@ class Enemy(PhysicsEntity):
         if abs(self.game.player.dashing) >= 50:
             if self.rect().colliderect(self.game.player.rect()):
                 self.game.screenshake = max(16, self.game.screenshake)
-                self.game.sfx['hit'].play()
-                for i in range(30):
-                    angle = random.random() * math.pi * 2
-                    speed = random.random() * 5
-                    self.game.sparks.append(Spark(self.rect().center, angle, 2 + random.random()))
-                    self.game.particles.append(Particle(self.game, 'particle', self.rect().center, velocity=[math.cos(angle + math.pi) * speed * 0.5, math.sin(angle + math.pi) * speed * 0.5], frame=random.randint(0, 7)))
-                self.game.sparks.append(Spark(self.rect().center, 0, 5 + random.random()))
-                self.game.sparks.append(Spark(self.rect().center, math.pi, 5 + random.random()))
+                self.game.audio.play('hit')
+                self.game.burst(self.rect().center, 30)
+                self.game.add_spark(Spark(self.rect().center, 0, 5 + self.game.rng.vfx.random()))
+                self.game.add_spark(Spark(self.rect().center, math.pi, 5 + self.game.rng.vfx.random()))
                 return True
             
     def render(self, surf, offset=(0, 0)):
@@ -177,11 +215,12 @@ class Player(PhysicsEntity):
                 self.set_action('idle')
         
         if abs(self.dashing) in {60, 50}:
-            for i in range(20):
-                angle = random.random() * math.pi * 2
-                speed = random.random() * 0.5 + 0.5
+            values = self.game.rng.vfx.randoms(self.game.quality.density(20) * 3)
+            for i in range(0, len(values), 3):
+                angle = values[i] * math.pi * 2
+                speed = values[i + 1] * 0.5 + 0.5
                 pvelocity = [math.cos(angle) * speed, math.sin(angle) * speed]
-                self.game.particles.append(Particle(self.game, 'particle', self.rect().center, velocity=pvelocity, frame=random.randint(0, 7)))
+                self.game.add_particle(Particle(self.game, 'particle', self.rect().center, velocity=pvelocity, frame=int(values[i + 2] * 8)))
         if self.dashing > 0:
             self.dashing = max(0, self.dashing - 1)
         if self.dashing < 0:
@@ -190,8 +229,8 @@ class Player(PhysicsEntity):
             self.velocity[0] = abs(self.dashing) / self.dashing * 8
             if abs(self.dashing) == 51:
                 self.velocity[0] *= 0.1
-            pvelocity = [abs(self.dashing) / self.dashing * random.random() * 3, 0]
-            self.game.particles.append(Particle(self.game, 'particle', self.rect().center, velocity=pvelocity, frame=random.randint(0, 7)))
+            pvelocity = [abs(self.dashing) / self.dashing * self.game.rng.vfx.random() * 3, 0]
+            self.game.add_particle(Particle(self.game, 'particle', self.rect().center, velocity=pvelocity, frame=self.game.rng.vfx.randint(0, 7)))
                 
         if self.velocity[0] > 0:
             self.velocity[0] = max(self.velocity[0] - 0.1, 0)
@@ -225,7 +264,7 @@ class Player(PhysicsEntity):
     
     def dash(self):
         if not self.dashing:
-            self.game.sfx['dash'].play()
+            self.game.audio.play('dash')
             if self.flip:
                 self.dashing = -60
             else:
@@ -0,0 +1,211 @@
+import json
+import os
+import threading
+
+from scripts.tilemap import write_map
+
+def same_tile(a, b):
+    return a['type'] == b['type'] and a['variant'] == b['variant'] and list(a['pos']) == list(b['pos'])
+
+def apply_edit(tilemap, edit):
+    for loc, tile in edit['grid'].items():
+        if tile is None:
+            tilemap.tilemap.pop(loc, None)
+        else:
+            tilemap.tilemap[loc] = tile
+    for tile in edit['remove']:
+        for other in tilemap.offgrid_tiles:
+            if same_tile(tile, other):
+                tilemap.offgrid_tiles.remove(other)
+                break
+    for tile in edit['add']:
+        if not any(same_tile(tile, other) for other in tilemap.offgrid_tiles):
+            tilemap.offgrid_tiles.append(tile)
+
+class EditJournal:
+    def __init__(self, path):
+        self.path = path
+        self.segments = self.find_segments()
+        self.segment = (self.segments[-1] + 1) if self.segments else 0
+        self.file = None
+        self.entries = 0
+        self.thread = None
+
+    def find_segments(self):
+        folder = os.path.dirname(self.path) or '.'
+        prefix = os.path.basename(self.path) + '.journal.'
+        segments = []
+        for name in os.listdir(folder):
+            if name.startswith(prefix) and name[len(prefix):].isdigit():
+                segments.append(int(name[len(prefix):]))
+        return sorted(segments)
+
+    def segment_path(self, segment):
+        return self.path + '.journal.' + str(segment)
+
+    def replay(self, tilemap):
+        # Edits left behind by a session that never compacted (crash, kill) are reapplied on top of the map
+        replayed = 0
+        for segment in self.segments:
+            f = open(self.segment_path(segment), 'r')
+            for line in f:
+                try:
+                    edit = json.loads(line)
+                except ValueError:
+                    break
+                apply_edit(tilemap, edit)
+                replayed += 1
+            f.close()
+        self.entries += replayed
+        return replayed
+
+    def append(self, edit):
+        if not self.file:
+            self.file = open(self.segment_path(self.segment), 'a')
+            self.segments.append(self.segment)
+        self.file.write(json.dumps(edit) + '\n')
+        self.file.flush()
+        self.entries += 1
+
+    def busy(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def compact(self, tilemap, wait=False):
+        if self.busy():
+            if not wait:
+                return False
+            self.thread.join()
+
+        # Detach the state on this thread: tile dicts are never mutated in place, so shallow copies are enough
+        tiles = dict(tilemap.tilemap)
+        offgrid = list(tilemap.offgrid_tiles)
+        tile_size = tilemap.tile_size
+
+        # Edits from now on go to a fresh segment, the ones covered by this snapshot can be dropped once it is written
+        if self.file:
+            self.file.close()
+            self.file = None
+        covered = list(self.segments)
+        self.segments = []
+        self.segment += 1
+        self.entries = 0
+
+        self.thread = threading.Thread(target=self.write, args=(tiles, tile_size, offgrid, covered), daemon=True)
+        self.thread.start()
+        if wait:
+            self.thread.join()
+        return True
+
+    def write(self, tiles, tile_size, offgrid, covered):
+        tmp_path = self.path + '.tmp'
+        write_map(tmp_path, tiles, tile_size, offgrid)
+        os.replace(tmp_path, self.path)
+        for segment in covered:
+            try:
+                os.remove(self.segment_path(segment))
+            except FileNotFoundError:
+                pass
+
+    def close(self, tilemap):
+        self.compact(tilemap, wait=True)
+
+class EditHistory:
+    def __init__(self, tilemap, journal=None, listener=None):
+        self.tilemap = tilemap
+        self.journal = journal
+        self.listener = listener
+        self.undo_stack = []
+        self.redo_stack = []
+        self.stroke = None
+
+    def begin(self):
+        if self.stroke is None:
+            self.stroke = {'grid': {}, 'remove': [], 'add': []}
+
+    def end(self):
+        stroke = self.stroke
+        self.stroke = None
+        if not stroke:
+            return
+        stroke['grid'] = {loc: change for loc, change in stroke['grid'].items() if change[0] != change[1]}
+        if not (stroke['grid'] or stroke['remove'] or stroke['add']):
+            return
+        self.undo_stack.append(stroke)
+        self.redo_stack = []
+        self.log(stroke, False)
+
+    def record(self, loc, old, new):
+        if self.listener:
+            self.listener.tile_changed(loc)
+        single = self.stroke is None
+        self.begin()
+        if loc in self.stroke['grid']:
+            self.stroke['grid'][loc][1] = new
+        else:
+            self.stroke['grid'][loc] = [old, new]
+        if single:
+            self.end()
+
+    def set_tile(self, loc, tile):
+        old = self.tilemap.tilemap.get(loc)
+        if old == tile:
+            return
+        if tile is None:
+            del self.tilemap.tilemap[loc]
+        else:
+            self.tilemap.tilemap[loc] = tile
+        self.record(loc, old, tile)
+
+    def add_offgrid(self, tile):
+        single = self.stroke is None
+        self.begin()
+        self.tilemap.offgrid_tiles.append(tile)
+        self.stroke['add'].append(tile)
+        if self.listener:
+            self.listener.offgrid_changed(tile)
+        if single:
+            self.end()
+
+    def remove_offgrid(self, tile):
+        single = self.stroke is None
+        self.begin()
+        self.tilemap.offgrid_tiles.remove(tile)
+        if tile in self.stroke['add']:
+            self.stroke['add'].remove(tile)
+        else:
+            self.stroke['remove'].append(tile)
+        if self.listener:
+            self.listener.offgrid_changed(tile)
+        if single:
+            self.end()
+
+    def undo(self):
+        self.end()
+        if self.undo_stack:
+            stroke = self.undo_stack.pop()
+            self.log(stroke, True, apply=True)
+            self.redo_stack.append(stroke)
+
+    def redo(self):
+        self.end()
+        if self.redo_stack:
+            stroke = self.redo_stack.pop()
+            self.log(stroke, False, apply=True)
+            self.undo_stack.append(stroke)
+
+    def log(self, stroke, inverse, apply=False):
+        side = 0 if inverse else 1
+        edit = {
+            'grid': {loc: change[side] for loc, change in stroke['grid'].items()},
+            'remove': stroke['add'] if inverse else stroke['remove'],
+            'add': stroke['remove'] if inverse else stroke['add'],
+        }
+        if apply:
+            apply_edit(self.tilemap, edit)
+            if self.listener:
+                for loc in edit['grid']:
+                    self.listener.tile_changed(loc)
+                for tile in edit['remove'] + edit['add']:
+                    self.listener.offgrid_changed(tile)
+        if self.journal:
+            self.journal.append(edit)
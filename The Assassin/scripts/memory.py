@@ -0,0 +1,140 @@
+import contextlib
+import gc
+import time
+import tracemalloc
+from collections import deque
+
+GC_MODES = ('auto', 'freeze', 'manual')
+YOUNG_LIMIT = 2000  # Young container objects allowed to pile up before a manual collection
+REPORT_INTERVAL = 300  # Frames between allocation reports
+REPORT_TOP = 8  # Allocation sites listed per report
+
+class MemoryManager:
+    def __init__(self, mode='freeze', report=False, young_limit=YOUNG_LIMIT, interval=REPORT_INTERVAL):
+        # auto: stock collector. freeze: level data is moved out of the collector's reach after each load.
+        # manual: freeze, plus the collector only runs at the end of a frame, and fully only at quiet points.
+        if mode not in GC_MODES:
+            raise ValueError('unknown gc mode: ' + str(mode))
+        self.mode = mode
+        self.young_limit = young_limit
+        self.pauses = deque(maxlen=256)  # (generation, ms) of recent collections
+        self.started = None
+        if report:
+            gc.callbacks.append(self.gc_callback)  # Pauses are only read by the report
+        if mode == 'manual':
+            gc.disable()
+        self.tracker = AllocationTracker(self, interval) if report else None
+        self.untracked = contextlib.nullcontext()
+
+    def gc_callback(self, phase, info):
+        if phase == 'start':
+            self.started = time.perf_counter()
+        elif self.started is not None:
+            self.pauses.append((info['generation'], (time.perf_counter() - self.started) * 1000))
+            self.started = None
+
+    def level_loaded(self):
+        if self.mode == 'auto':
+            return
+        # Data frozen for the previous level gets one full collection before the new level takes its place
+        gc.unfreeze()
+        gc.collect()
+        gc.freeze()
+
+    def frame(self, quiet=False):
+        if self.mode == 'manual':
+            young = gc.get_count()[0]
+            if quiet and young:
+                gc.collect(1)  # Screen is covered by a transition, a longer pause goes unnoticed
+            elif young > self.young_limit:
+                gc.collect(0)
+        if self.tracker:
+            self.tracker.frame()
+
+    def section(self, name):
+        if self.tracker:
+            return self.tracker.section(name)
+        return self.untracked
+
+    def close(self):
+        if self.gc_callback in gc.callbacks:
+            gc.callbacks.remove(self.gc_callback)
+        if self.mode == 'manual':
+            gc.enable()
+        if self.tracker:
+            self.tracker.close()
+
+class AllocationTracker:
+    def __init__(self, memory, interval=REPORT_INTERVAL, top=REPORT_TOP):
+        self.memory = memory
+        self.interval = interval
+        self.top = top
+        self.frames = 0
+        self.sections = {}  # name: Section, reused every frame so measuring allocates nothing itself
+        tracemalloc.start()
+        self.filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, '<frozen *>')]
+        self.last = tracemalloc.take_snapshot().filter_traces(self.filters)
+
+        # What entering and leaving a section costs by itself, taken off every measurement
+        probe = Section()
+        for i in range(16):
+            with probe:
+                pass
+        self.overhead = (round(probe.size / 16), round(probe.objects / 16))
+
+    def section(self, name):
+        section = self.sections.get(name)
+        if section is None:
+            section = self.sections[name] = Section(self.overhead)
+        return section
+
+    def frame(self):
+        self.frames += 1
+        if self.frames % self.interval == 0:
+            self.report()
+
+    def report(self):
+        frames = self.interval
+        print('allocations over ' + str(frames) + ' frames')
+        print('  section        net B/frame   peak KiB   gc objects/frame')
+        for name, section in sorted(self.sections.items(), key=lambda item: -item[1].peak):
+            print('  %-12s %12.0f %10.1f %18.1f' % (name, section.size / frames, section.peak / 1024, section.objects / frames))
+            section.reset()
+
+        pauses = list(self.memory.pauses)
+        self.memory.pauses.clear()
+        counts = [sum(1 for generation, ms in pauses if generation == i) for i in range(3)]
+        worst = max([ms for generation, ms in pauses], default=0)
+        print('  gc: %d/%d/%d collections (gen 0/1/2), worst pause %.2f ms' % (counts[0], counts[1], counts[2], worst))
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(self.filters)
+        print('  top allocation sites:')
+        for stat in snapshot.compare_to(self.last, 'lineno')[:self.top]:
+            frame = stat.traceback[0]
+            print('    %s:%d  %+d B in %+d blocks' % (frame.filename, frame.lineno, stat.size_diff, stat.count_diff))
+        self.last = snapshot
+
+    def close(self):
+        tracemalloc.stop()
+
+class Section:
+    def __init__(self, overhead=(0, 0)):
+        self.overhead = overhead
+        self.reset()
+
+    def reset(self):
+        self.size = 0  # Net bytes still allocated when the section ends
+        self.peak = 0  # Highest transient growth inside the section
+        self.objects = 0  # Net container objects, the count that triggers collections
+        self.start = (0, 0)
+
+    def __enter__(self):
+        # Net growth is what the collector sees, the peak shows short lived garbage that never reaches it
+        tracemalloc.reset_peak()
+        self.start = (tracemalloc.get_traced_memory()[0], gc.get_count()[0])
+
+    def __exit__(self, *exc):
+        current, peak = tracemalloc.get_traced_memory()
+        self.size += current - self.start[0] - self.overhead[0]
+        self.peak = max(self.peak, peak - self.start[0])
+        self.objects += gc.get_count()[0] - self.start[1] - self.overhead[1]
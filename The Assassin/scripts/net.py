@@ -0,0 +1,163 @@
+import socket
+import struct
+
+DEFAULT_PORT = 7777
+POSITION_QUANTUM = 8  # Positions travel as int16 in 1/8 pixel steps
+VELOCITY_QUANTUM = 64  # Velocities travel as int16 in 1/64 pixel per tick steps
+ANGLE_QUANTUM = 10000  # Spark angles travel as uint16 in 1/10000 radian steps
+
+# Input bits, one input message per client tick
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_JUMP = 4  # Pressed this tick
+INPUT_DASH = 8  # Pressed this tick
+
+# Message types
+MSG_HELLO = 1  # Client: session id, spectate flag
+MSG_INPUT = 2  # Client: input sequence number, input bits
+MSG_WELCOME = 10  # Server: session id, role
+MSG_LEVEL = 11  # Server: level id to load locally, every entity is resent after it
+MSG_SNAPSHOT = 12  # Server: state changed since the previous snapshot sent to this client
+
+ROLE_PLAYER = 0
+ROLE_SPECTATOR = 1
+
+# Effect events, spawned on the client instead of streaming every particle
+EVENT_SPARK = 1
+EVENT_PARTICLE = 2
+EVENT_BURST = 3
+EVENT_SOUND = 4
+
+HAS_PLAYER = 1  # Snapshot flag: player state follows the header
+
+ACTIONS = ('idle', 'run', 'jump', 'wall_slide')
+PARTICLE_TYPES = ('particle', 'leaf')
+SOUNDS = ('hit', 'jump', 'dash', 'shoot', 'ambience')
+
+HEADER = struct.Struct('!HB')  # Payload length, message type
+HELLO = struct.Struct('!HB')  # Session id, spectate
+INPUT = struct.Struct('!IB')  # Sequence number, input bits
+WELCOME = struct.Struct('!HB')  # Session id, role
+LEVEL = struct.Struct('!B')  # Level id
+SNAPSHOT = struct.Struct('!IIBBBbB')  # Tick, last applied input, ticks run on since without input, flags, screenshake, transition, dead timer
+PLAYER = struct.Struct('!ffffHBbBB')  # x, y, vx, vy, air time, jumps, dashing, flip | last movement << 1, action. Unquantized, replaying prediction from a rounded state would drift
+ENEMY = struct.Struct('!HhhB')  # Net id, x, y, flip | action << 1
+PROJECTILE = struct.Struct('!Hhhb')  # Net id, x, y, direction in half pixels per tick
+COUNT = struct.Struct('!H')
+NET_ID = struct.Struct('!H')
+EVENTS = {
+    EVENT_SPARK: struct.Struct('!BhhHH'),  # Kind, x, y, angle, speed
+    EVENT_PARTICLE: struct.Struct('!BBhhhhB'),  # Kind, type, x, y, vx, vy, frame
+    EVENT_BURST: struct.Struct('!BhhB'),  # Kind, x, y, count
+    EVENT_SOUND: struct.Struct('!BB'),  # Kind, sound
+}
+
+def quantize(value, quantum=POSITION_QUANTUM):
+    return max(-32768, min(32767, round(value * quantum)))
+
+def pack_items(layout, items):
+    return COUNT.pack(len(items)) + b''.join(layout.pack(*item) for item in items)
+
+def unpack_items(layout, payload, offset):
+    count = COUNT.unpack_from(payload, offset)[0]
+    offset += COUNT.size
+    items = [layout.unpack_from(payload, offset + i * layout.size) for i in range(count)]
+    return items, offset + count * layout.size
+
+def pack_snapshot(tick, ack, held, screenshake, transition, dead, player, enemies, removed_enemies, projectiles, removed_projectiles, events):
+    parts = [SNAPSHOT.pack(tick, ack, min(255, held), HAS_PLAYER if player else 0, min(255, int(screenshake)), max(-128, min(127, transition)), min(255, dead))]
+    if player:
+        parts.append(PLAYER.pack(*player))
+    parts.append(pack_items(ENEMY, enemies))
+    parts.append(COUNT.pack(len(removed_enemies)) + b''.join(NET_ID.pack(net_id) for net_id in removed_enemies))
+    parts.append(pack_items(PROJECTILE, projectiles))
+    parts.append(COUNT.pack(len(removed_projectiles)) + b''.join(NET_ID.pack(net_id) for net_id in removed_projectiles))
+    parts.append(COUNT.pack(len(events)))
+    parts.extend(events)  # Already packed when they happened
+    return b''.join(parts)
+
+def unpack_snapshot(payload):
+    tick, ack, held, flags, screenshake, transition, dead = SNAPSHOT.unpack_from(payload)
+    offset = SNAPSHOT.size
+    player = None
+    if flags & HAS_PLAYER:
+        player = PLAYER.unpack_from(payload, offset)
+        offset += PLAYER.size
+    enemies, offset = unpack_items(ENEMY, payload, offset)
+    removed_enemies, offset = unpack_items(NET_ID, payload, offset)
+    projectiles, offset = unpack_items(PROJECTILE, payload, offset)
+    removed_projectiles, offset = unpack_items(NET_ID, payload, offset)
+    count = COUNT.unpack_from(payload, offset)[0]
+    offset += COUNT.size
+    events = []
+    for i in range(count):
+        layout = EVENTS[payload[offset]]
+        events.append(layout.unpack_from(payload, offset))
+        offset += layout.size
+    return {
+        'tick': tick, 'ack': ack, 'held': held, 'screenshake': screenshake, 'transition': transition, 'dead': dead, 'player': player,
+        'enemies': enemies, 'removed_enemies': [item[0] for item in removed_enemies],
+        'projectiles': projectiles, 'removed_projectiles': [item[0] for item in removed_projectiles], 'events': events,
+    }
+
+class Connection:
+    def __init__(self, sock):
+        self.sock = sock
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # Snapshots are small and late ones are useless
+        self.inbox = bytearray()
+        self.outbox = bytearray()
+        self.closed = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def send(self, kind, payload=b''):
+        self.outbox += HEADER.pack(len(payload), kind)
+        self.outbox += payload
+
+    def flush(self):
+        if not self.outbox or self.closed:
+            return
+        try:
+            sent = self.sock.send(self.outbox)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self.closed = True
+            return
+        del self.outbox[:sent]
+        self.bytes_out += sent
+
+    def receive(self):
+        # Reads whatever has arrived and returns the complete (type, payload) messages in it
+        while not self.closed:
+            try:
+                data = self.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                data = b''
+            if not data:
+                self.closed = True
+                break
+            self.inbox += data
+            self.bytes_in += len(data)
+
+        messages = []
+        offset = 0
+        while len(self.inbox) - offset >= HEADER.size:
+            length, kind = HEADER.unpack_from(self.inbox, offset)
+            if len(self.inbox) - offset - HEADER.size < length:
+                break
+            start = offset + HEADER.size
+            messages.append((kind, bytes(self.inbox[start:start + length])))
+            offset = start + length
+        del self.inbox[:offset]
+        return messages
+
+    def close(self):
+        self.closed = True
+        self.sock.close()
@@ -0,0 +1,40 @@
+import pygame
+
+class ParallaxLayer:
+    def __init__(self, img, depth=1.0, speed=(0, 0), wrap=True):
+        self.img = img
+        self.depth = depth
+        self.speed = speed
+        self.wrap = wrap
+        self.drift = [0, 0]
+
+    def update(self):
+        self.drift[0] += self.speed[0]
+        self.drift[1] += self.speed[1]
+
+    def render(self, surf, offset=(0, 0)):
+        pos = (self.drift[0] - offset[0] * self.depth, self.drift[1] - offset[1] * self.depth)
+        if not self.wrap:
+            surf.blit(self.img, pos)
+            return
+        # The strip is at least as large as the view, so four fixed copies always cover it (off-view copies are clipped)
+        width, height = self.img.get_size()
+        x = pos[0] % width
+        y = pos[1] % height
+        surf.blit(self.img, (x - width, y - height))
+        surf.blit(self.img, (x, y - height))
+        surf.blit(self.img, (x - width, y))
+        surf.blit(self.img, (x, y))
+
+def wrap_strip(size, sprites, colorkey=(0, 0, 0)):
+    strip = pygame.Surface(size).convert()
+    strip.fill(colorkey)
+    for img, pos in sprites:
+        x = pos[0] % size[0]
+        y = pos[1] % size[1]
+        # Sprites crossing the seam are drawn again on the opposite side so the strip tiles seamlessly
+        for dx in (0, -size[0]):
+            for dy in (0, -size[1]):
+                strip.blit(img, (x + dx, y + dy))
+    strip.set_colorkey(colorkey, pygame.RLEACCEL)
+    return strip
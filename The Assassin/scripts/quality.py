@@ -0,0 +1,61 @@
+QUALITY_PRESETS = {
+    # particles/sparks: caps on live effects. burst/leaves: share of the full effect density spawned.
+    # outline: silhouette shading pass. upscale: filter used to blow the 320x240 frame up to the window.
+    'low': {'particles': 64, 'sparks': 32, 'burst': 0.25, 'leaves': 0.25, 'outline': False, 'upscale': 'scale'},
+    'medium': {'particles': 160, 'sparks': 96, 'burst': 0.5, 'leaves': 0.5, 'outline': True, 'upscale': 'scale'},
+    'high': {'particles': 512, 'sparks': 256, 'burst': 1.0, 'leaves': 1.0, 'outline': True, 'upscale': 'scale'},
+    'ultra': {'particles': 1024, 'sparks': 512, 'burst': 1.0, 'leaves': 1.0, 'outline': True, 'upscale': 'scale2x'},
+}
+QUALITY_LEVELS = ['low', 'medium', 'high', 'ultra']
+
+class QualityGovernor:
+    def __init__(self, preset='high', adaptive=False, fps=60, window=30, lower=0.9, raise_below=0.5):
+        self.level = QUALITY_LEVELS.index(preset)
+        self.settings = QUALITY_PRESETS[preset]
+        self.adaptive = adaptive
+        self.budget_ms = 1000 / (fps or 60)
+        self.window = window  # Frames measured per decision
+        self.lower = lower  # Share of the frame budget above which quality drops
+        self.raise_below = raise_below  # Share of the frame budget below which quality may rise
+        self.samples = []
+        self.calm = 0  # Windows in a row with plenty of headroom
+        self.patience = 4  # Calm windows needed before raising, doubles when a raise does not hold
+        self.raised = False
+
+    @property
+    def name(self):
+        return QUALITY_LEVELS[self.level]
+
+    def set_level(self, level):
+        self.level = max(0, min(len(QUALITY_LEVELS) - 1, level))
+        self.settings = QUALITY_PRESETS[QUALITY_LEVELS[self.level]]
+
+    def density(self, count):
+        return max(1, round(count * self.settings['burst']))
+
+    def frame(self, work_ms):
+        if not self.adaptive:
+            return
+        self.samples.append(work_ms)
+        if len(self.samples) < self.window:
+            return
+
+        # 90th percentile rather than the mean, a steady run of hitches matters more than a good average
+        load = sorted(self.samples)[int(len(self.samples) * 0.9)] / self.budget_ms
+        self.samples = []
+        if load > self.lower and self.level > 0:
+            if self.raised:
+                self.patience = min(64, self.patience * 2)  # That level did not hold, wait longer before trying it again
+            self.set_level(self.level - 1)
+            self.calm = 0
+            self.raised = False
+        elif load < self.raise_below:
+            self.calm += 1
+            self.raised = False
+            if self.calm >= self.patience and self.level < len(QUALITY_LEVELS) - 1:
+                self.set_level(self.level + 1)
+                self.calm = 0
+                self.raised = True
+        else:
+            self.calm = 0
+            self.raised = False
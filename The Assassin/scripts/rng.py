@@ -0,0 +1,64 @@
+import numpy as np
+
+# ai: gameplay decisions. vfx: sparks, particles and clouds. spawning: ambient spawners.
+# screen: render side effects (screenshake), drawn from the render thread when the simulation is threaded.
+STREAMS = ('ai', 'vfx', 'spawning', 'screen')
+BUFFER_SIZE = 1024  # Values generated per refill
+
+class RandomStream:
+    def __init__(self, seed, size=BUFFER_SIZE):
+        self.generator = np.random.default_rng(seed)
+        self.size = size
+        self.array = None
+        self.values = []
+        self.index = size  # Empty, the first draw refills
+
+    def refill(self):
+        # One vectorized call fills the buffer, values left over from the previous one are dropped
+        self.array = self.generator.random(self.size)
+        self.values = self.array.tolist()  # Plain floats for scalar draws, indexing a list is much cheaper than an array
+        self.index = 0
+
+    def random(self):
+        if self.index >= self.size:
+            self.refill()
+        value = self.values[self.index]
+        self.index += 1
+        return value
+
+    def randint(self, a, b):
+        return a + int(self.random() * (b - a + 1))
+
+    def choice(self, seq):
+        return seq[int(self.random() * len(seq))]
+
+    def randoms(self, n):
+        # n values in [0, 1) as a list, for unpacking a whole effect's worth at once
+        if n > self.size:
+            return self.generator.random(n).tolist()
+        if self.index + n > self.size:
+            self.refill()
+        values = self.values[self.index:self.index + n]
+        self.index += n
+        return values
+
+    def uniforms(self, n):
+        # Same as randoms, as a NumPy array for vectorized rolls
+        if n > self.size:
+            return self.generator.random(n)
+        if self.index + n > self.size:
+            self.refill()
+        values = self.array[self.index:self.index + n]
+        self.index += n
+        return values
+
+class RandomService:
+    def __init__(self, seed=None):
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        # Every stream gets its own child sequence, so drawing more from one never shifts another
+        root = np.random.SeedSequence(seed)
+        self.entropy = root.entropy  # Seed actually used, to reproduce an unseeded run
+        for name, child in zip(STREAMS, root.spawn(len(STREAMS))):
+            setattr(self, name, RandomStream(child))
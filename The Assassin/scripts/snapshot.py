@@ -0,0 +1,108 @@
+from operator import itemgetter
+
+TELEPORT_DISTANCE = 32
+
+# Draw order, lowest first. Each render pass draws a range of layers onto its own target.
+LAYER_BACKGROUND = 0
+LAYER_TILES = 10
+LAYER_ENEMIES = 20
+LAYER_PLAYER = 30
+LAYER_PROJECTILES = 40
+LAYER_PARTICLES = 50
+BACKGROUND_LAYERS = (LAYER_BACKGROUND, LAYER_TILES)  # Screen space, behind the outline
+WORLD_LAYERS = (LAYER_TILES, LAYER_PARTICLES)  # World space, casts the outline
+OVERLAY_LAYERS = (LAYER_PARTICLES, LAYER_PARTICLES + 10)  # World space, on top of the outline
+
+class RenderQueue:
+    def __init__(self, size, offset=(0, 0), keyed=True):
+        # keyed: (layer, interpolation key, img, x, y) entries in queue space, for snapshots drawn later and interpolated.
+        # unkeyed: (img, pos) pairs per layer, recorded as given, for drawing the live state straight away.
+        self.keyed = keyed
+        self.entries = [] if keyed else {}
+        self.bucket = None
+        self.key = None
+        self.key_index = 0
+        self.layer = 0
+        self.target(size, offset)
+
+    def target(self, size, offset=(0, 0)):
+        # Size of the view following blits are culled against, and the offset that moves them into queue space (keyed only)
+        self.size = size
+        self.offset = offset
+
+    def get_width(self):
+        return self.size[0]
+
+    def get_height(self):
+        return self.size[1]
+
+    def get_size(self):
+        return self.size
+
+    def begin(self, key, layer):
+        if not self.keyed:
+            if layer != self.layer or self.bucket is None:
+                self.layer = layer
+                self.bucket = self.entries.setdefault(layer, [])
+            return
+        self.key = key
+        self.key_index = 0
+        self.layer = layer
+
+    def blit(self, img, pos):
+        if not self.keyed:
+            x, y = pos
+            if x < self.size[0] and y < self.size[1] and x + img.get_width() > 0 and y + img.get_height() > 0:
+                self.bucket.append((img, pos))  # Already the pair blits takes
+            return
+        key = None
+        if self.key is not None:
+            key = (self.key, self.key_index)  # Counted even when culled, so keys stay stable as things cross the view edge
+            self.key_index += 1
+        x, y = pos
+        width, height = img.get_size()
+        if x >= self.size[0] or y >= self.size[1] or x + width <= 0 or y + height <= 0:
+            return
+        self.entries.append((self.layer, key, img, x + self.offset[0], y + self.offset[1]))
+
+    def finish(self):
+        if self.keyed:
+            self.entries.sort(key=itemgetter(0))  # Stable, submission order is kept within a layer
+        return self.entries
+
+class FrameSnapshot:
+    def __init__(self, scroll, screenshake, transition, entries, sparks):
+        self.scroll = scroll
+        self.screenshake = screenshake
+        self.transition = transition
+        self.entries = entries
+        self.sparks = sparks
+
+def lerp_scroll(previous, current, alpha):
+    return (previous.scroll[0] + (current.scroll[0] - previous.scroll[0]) * alpha, previous.scroll[1] + (current.scroll[1] - previous.scroll[1]) * alpha)
+
+def interpolate(previous, current, alpha):
+    if previous is current or alpha >= 1:
+        return current
+
+    last = {}
+    for entry in previous:
+        if entry[1] is not None:
+            last[entry[1]] = entry
+
+    entries = []
+    for entry in current:
+        old = last.get(entry[1]) if entry[1] is not None else None
+        if old and abs(entry[3] - old[3]) + abs(entry[4] - old[4]) < TELEPORT_DISTANCE:
+            entry = (entry[0], entry[1], entry[2], old[3] + (entry[3] - old[3]) * alpha, old[4] + (entry[4] - old[4]) * alpha)
+        entries.append(entry)
+    return entries
+
+def draw(surf, entries, offset=(0, 0), layers=(LAYER_BACKGROUND, OVERLAY_LAYERS[1])):
+    low, high = layers
+    if isinstance(entries, dict):  # Unkeyed queue, one ready made blits list per layer
+        for layer in sorted(entries):
+            if low <= layer < high:
+                surf.blits(entries[layer], doreturn=False)
+        return
+    surf.blits([(img, (x - offset[0], y - offset[1])) for layer, key, img, x, y in entries if low <= layer < high], doreturn=False)
@@ -18,6 +18,11 @@ NEIGHBOR_OFFSETS = [(-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0), (0, 0), (-1, 1)
 PHYSICS_TILES = {'grass', 'stone'}
 AUTOTILE_TYPES = {'grass', 'stone'}
 
+def write_map(path, tilemap, tile_size, offgrid_tiles):
+    f = open(path, 'w')
+    json.dump({'tilemap': tilemap, 'tile_size': tile_size, 'offgrid': offgrid_tiles}, f)
+    f.close()
+
 class Tilemap:
     def __init__(self, game, tile_size=16):
         self.game = game
@@ -55,9 +60,7 @@ class Tilemap:
         return tiles
     
     def save(self, path):
-        f = open(path, 'w')
-        json.dump({'tilemap': self.tilemap, 'tile_size': self.tile_size, 'offgrid': self.offgrid_tiles}, f)
-        f.close()
+        write_map(path, self.tilemap, self.tile_size, self.offgrid_tiles)
         
     def load(self, path):
         f = open(path, 'r')
@@ -82,6 +85,7 @@ class Tilemap:
         return rects
     
     def autotile(self):
+        changes = []
         for loc in self.tilemap:
             tile = self.tilemap[loc]
             neighbors = set()
@@ -91,8 +95,11 @@ class Tilemap:
                     if self.tilemap[check_loc]['type'] == tile['type']:
                         neighbors.add(shift)
             neighbors = tuple(sorted(neighbors))
-            if (tile['type'] in AUTOTILE_TYPES) and (neighbors in AUTOTILE_MAP):
-                tile['variant'] = AUTOTILE_MAP[neighbors]
+            if (tile['type'] in AUTOTILE_TYPES) and (neighbors in AUTOTILE_MAP) and tile['variant'] != AUTOTILE_MAP[neighbors]:
+                new_tile = dict(tile, variant=AUTOTILE_MAP[neighbors])
+                self.tilemap[loc] = new_tile
+                changes.append((loc, tile, new_tile))
+        return changes
 
     def render(self, surf, offset=(0, 0)):
         for tile in self.offgrid_tiles:
@@ -0,0 +1,315 @@
+# Authoritative headless server. Every session is a full Game ticked at the simulation rate on
+# this process; clients send inputs and receive delta-compressed state snapshots over TCP.
+#
+#   python server.py --port 7777 --stats
+#   python client.py --session 1                 # first client of a session plays
+#   python client.py --session 1 --spectate      # every other one watches
+
+import argparse
+import math
+import selectors
+import socket
+import time
+from collections import deque
+
+from game import Game, TICK_RATE
+from scripts.net import Connection, DEFAULT_PORT, VELOCITY_QUANTUM, ANGLE_QUANTUM
+from scripts.net import INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, INPUT_DASH, MSG_HELLO, MSG_INPUT, MSG_WELCOME, MSG_LEVEL, MSG_SNAPSHOT
+from scripts.net import ROLE_PLAYER, ROLE_SPECTATOR, EVENT_SPARK, EVENT_PARTICLE, EVENT_BURST, EVENT_SOUND, EVENTS
+from scripts.net import ACTIONS, PARTICLE_TYPES, SOUNDS, HELLO, INPUT, WELCOME, LEVEL, quantize, pack_snapshot
+
+MAX_EVENTS = 256  # Effect events queued per client, they are cosmetic so the rest are dropped
+MAX_BACKLOG = 32768  # Unsent bytes on a client before its snapshots are held back
+MAX_INPUTS = 8  # Inputs queued per session, the oldest are dropped beyond that
+STATS_INTERVAL = 5.0
+MESSAGE_SIZES = {MSG_HELLO: HELLO.size, MSG_INPUT: INPUT.size}  # Client messages are fixed size
+
+
+class SoundEvents:
+    # Stands in for the audio manager, sounds become events played by the clients
+    def __init__(self, game):
+        self.game = game
+
+    def play(self, name, loops=0):
+        self.game.events.append(EVENTS[EVENT_SOUND].pack(EVENT_SOUND, SOUNDS.index(name)))
+
+    def stop(self, name=None):
+        pass
+
+    def play_music(self, path, volume=1.0, loops=-1):
+        pass
+
+
+class ServerGame(Game):
+    def __init__(self, level=0, seed=None):
+        self.events = []  # Effect events of the current tick, packed
+        self.level_serial = 0  # Bumped on every load, including reloads after a death
+        self.next_net_id = 1
+        super().__init__(headless=True, gc_mode='auto', seed=seed)  # Freezing collects the whole process, every session would stall on each reload
+        self.audio = SoundEvents(self)
+        self.level = level
+        self.load_level(level)
+
+    def load_level(self, map_id):
+        super().load_level(map_id)
+        self.level_serial += 1
+        self.events = []  # Effects of the previous level would land on the new map
+        for i, enemy in enumerate(self.enemies):
+            enemy.net_id = i  # Enemies only ever disappear during a level, so their spawn order names them
+
+    # Ambient leaves and effect lifetimes are left to the clients
+    def spawn_leaves(self):
+        pass
+
+    def update_effects(self):
+        pass
+
+    def add_spark(self, spark):
+        self.events.append(EVENTS[EVENT_SPARK].pack(EVENT_SPARK, quantize(spark.pos[0]), quantize(spark.pos[1]), round(spark.angle % math.tau * ANGLE_QUANTUM), min(65535, round(spark.speed * VELOCITY_QUANTUM))))
+
+    def add_particle(self, particle):
+        self.events.append(EVENTS[EVENT_PARTICLE].pack(EVENT_PARTICLE, PARTICLE_TYPES.index(particle.type), quantize(particle.pos[0]), quantize(particle.pos[1]), quantize(particle.velocity[0], VELOCITY_QUANTUM), quantize(particle.velocity[1], VELOCITY_QUANTUM), particle.animation.frame))
+
+    def burst(self, pos, count):
+        self.events.append(EVENTS[EVENT_BURST].pack(EVENT_BURST, quantize(pos[0]), quantize(pos[1]), min(255, count)))
+
+    def tag_projectiles(self):
+        # Projectiles are plain lists, new ones get their net id appended
+        for projectile in self.projectiles:
+            if len(projectile) == 3:
+                projectile.append(self.next_net_id)
+                self.next_net_id = self.next_net_id % 65535 + 1
+
+
+def player_state(player):
+    last_movement = player.last_movement[0]
+    flags = int(player.flip) | ((1 if last_movement > 0 else 2 if last_movement < 0 else 0) << 1)
+    return (player.pos[0], player.pos[1], player.velocity[0], player.velocity[1],
+            min(65535, player.air_time), player.jumps, player.dashing, flags, ACTIONS.index(player.action))
+
+
+class Session:
+    def __init__(self, session_id, level=0, seed=None):
+        self.id = session_id
+        self.game = ServerGame(level, seed)
+        self.clients = []
+        self.owner = None
+        self.inputs = deque(maxlen=MAX_INPUTS)
+        self.ack = 0  # Sequence number of the last input applied
+        self.held = 0  # Ticks run since then without a new input, clients replay them when reconciling
+        self.tick = 0
+        self.player = None
+        self.enemies = {}
+        self.projectiles = {}
+
+    def apply_input(self):
+        game = self.game
+        if not self.inputs:
+            self.held += 1
+            return  # Nothing arrived in time, the held direction carries on
+        self.ack, bits = self.inputs.popleft()
+        self.held = 0
+        game.movement = [bool(bits & INPUT_LEFT), bool(bits & INPUT_RIGHT)]
+        if bits & INPUT_JUMP and game.player.jump():
+            game.audio.play('jump')
+        if bits & INPUT_DASH:
+            game.player.dash()
+
+    def step(self):
+        game = self.game
+        self.apply_input()
+        game.update()
+        if game.dead:
+            self.held = 0  # A dead player does not move, nothing to replay
+        game.tag_projectiles()
+        self.tick += 1
+
+        # Quantized once per tick, every client diffs against its own last sent copy
+        self.player = None if game.dead else player_state(game.player)
+        self.enemies = {enemy.net_id: (quantize(enemy.pos[0]), quantize(enemy.pos[1]), int(enemy.flip) | ACTIONS.index(enemy.action) << 1) for enemy in game.enemies}
+        self.projectiles = {projectile[3]: projectile for projectile in game.projectiles}
+        events = game.events
+        game.events = []
+
+        for client in self.clients:
+            client.send_snapshot(self, events)
+
+
+class Client:
+    def __init__(self, conn):
+        self.conn = conn
+        self.session = None
+        self.role = ROLE_SPECTATOR
+        self.level_serial = 0
+        self.writing = False
+        self.reset()
+
+    def reset(self):
+        # Last state sent, the next snapshot only carries what differs from it
+        self.header = None
+        self.player = None
+        self.enemies = {}
+        self.projectiles = set()
+        self.events = []
+
+    def send_snapshot(self, session, events):
+        game = session.game
+        if self.level_serial != game.level_serial:
+            self.level_serial = game.level_serial
+            self.reset()
+            self.conn.send(MSG_LEVEL, LEVEL.pack(game.level))  # Clients load the map themselves
+
+        self.events += events
+        if len(self.events) > MAX_EVENTS:
+            del self.events[:len(self.events) - MAX_EVENTS]
+        if len(self.conn.outbox) > MAX_BACKLOG:
+            return  # Slow reader, nothing is marked as sent so the next snapshot catches up in one go
+
+        player = session.player if session.player != self.player else None
+        enemies = [(net_id,) + state for net_id, state in session.enemies.items() if self.enemies.get(net_id) != state]
+        removed_enemies = [net_id for net_id in self.enemies if net_id not in session.enemies]
+        projectiles = [(net_id, quantize(projectile[0][0]), quantize(projectile[0][1]), round(projectile[1] * 2)) for net_id, projectile in session.projectiles.items() if net_id not in self.projectiles]
+        removed_projectiles = [net_id for net_id in self.projectiles if net_id not in session.projectiles]
+        header = (session.ack if self.role == ROLE_PLAYER else 0, session.held if self.role == ROLE_PLAYER else 0, game.screenshake, game.transition, game.dead, session.player is None)
+        if header == self.header and not (player or enemies or removed_enemies or projectiles or removed_projectiles or self.events):
+            return  # Nothing changed, not even the acknowledged input
+        self.conn.send(MSG_SNAPSHOT, pack_snapshot(session.tick, header[0], header[1], game.screenshake, game.transition, game.dead, player, enemies, removed_enemies, projectiles, removed_projectiles, self.events))
+
+        self.header = header
+        if player:
+            self.player = player
+        self.enemies = session.enemies
+        self.projectiles = set(session.projectiles)
+        self.events = []
+
+
+class Server:
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, level=0, seed=None, stats=False):
+        self.level = level
+        self.seed = seed
+        self.stats = stats
+        self.sessions = {}
+        self.clients = []
+        self.selector = selectors.DefaultSelector()
+        self.listener = socket.create_server((host, port))
+        self.listener.setblocking(False)
+        self.selector.register(self.listener, selectors.EVENT_READ, None)
+
+        self.session_ticks = 0
+        self.step_time = 0.0
+        self.bytes_out = 0
+        self.last_stats = time.perf_counter()
+
+    def accept(self):
+        try:
+            sock, address = self.listener.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        client = Client(Connection(sock))
+        self.clients.append(client)
+        self.selector.register(sock, selectors.EVENT_READ, client)
+
+    def read(self, client):
+        for kind, payload in client.conn.receive():
+            if kind in MESSAGE_SIZES and len(payload) != MESSAGE_SIZES[kind]:
+                client.conn.closed = True  # Malformed, only this client goes
+                break
+            if kind == MSG_HELLO and client.session is None:
+                session_id, spectate = HELLO.unpack(payload)
+                self.join(client, session_id, spectate)
+            elif kind == MSG_INPUT and client.session and client.role == ROLE_PLAYER:
+                client.session.inputs.append(INPUT.unpack(payload))
+        if client.conn.closed:
+            self.drop(client)
+
+    def join(self, client, session_id, spectate):
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = Session(session_id, self.level, self.seed)
+        client.role = ROLE_PLAYER if not spectate and session.owner is None else ROLE_SPECTATOR
+        if client.role == ROLE_PLAYER:
+            session.owner = client
+        client.session = session
+        session.clients.append(client)
+        client.conn.send(MSG_WELCOME, WELCOME.pack(session_id, client.role))
+
+    def drop(self, client):
+        if client not in self.clients:
+            return
+        self.clients.remove(client)
+        self.selector.unregister(client.conn.sock)
+        client.conn.close()
+        session = client.session
+        if session:
+            session.clients.remove(client)
+            if session.owner is client:
+                session.owner = None
+                session.inputs.clear()
+                session.game.movement = [False, False]
+            if not session.clients:
+                del self.sessions[session.id]
+                session.game.memory.close()
+
+    def step(self):
+        start = time.perf_counter()
+        for session in list(self.sessions.values()):
+            session.step()
+        self.step_time += time.perf_counter() - start
+        self.session_ticks += len(self.sessions)
+
+        for client in self.clients.copy():
+            sent = client.conn.bytes_out
+            client.conn.flush()
+            self.bytes_out += client.conn.bytes_out - sent
+            if client.conn.closed:
+                self.drop(client)
+            elif bool(client.conn.outbox) != client.writing:
+                # Only wait for writability while something is stuck in the buffer
+                client.writing = bool(client.conn.outbox)
+                self.selector.modify(client.conn.sock, selectors.EVENT_READ | (selectors.EVENT_WRITE if client.writing else 0), client)
+
+        if self.stats and start - self.last_stats >= STATS_INTERVAL:
+            elapsed = start - self.last_stats
+            per_session = self.step_time / max(1, self.session_ticks) * 1000
+            per_client = self.bytes_out / elapsed / max(1, len(self.clients)) / 1024
+            print('%d sessions, %d clients: %.3f ms per session tick, %.2f KiB/s per client, load %.0f%%' % (
+                len(self.sessions), len(self.clients), per_session, per_client, self.step_time / elapsed * 100))
+            self.session_ticks = 0
+            self.step_time = 0.0
+            self.bytes_out = 0
+            self.last_stats = start
+
+    def run(self):
+        tick = 1 / TICK_RATE
+        next_tick = time.perf_counter()
+        while True:
+            for key, mask in self.selector.select(max(0, next_tick - time.perf_counter())):
+                if key.data is None:
+                    self.accept()
+                    continue
+                client = key.data
+                if mask & selectors.EVENT_READ:
+                    self.read(client)
+                if mask & selectors.EVENT_WRITE and client in self.clients:
+                    client.conn.flush()
+            now = time.perf_counter()
+            if now >= next_tick:
+                self.step()
+                next_tick += tick
+                if now - next_tick > tick * 15:  # Too far behind, drop the backlog instead of catching up
+                    next_tick = now
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Authoritative headless server for The Assassin')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--level', type=int, default=0, help='level new sessions start on')
+    parser.add_argument('--seed', type=int, default=None, help='seed for every session, for reproducible runs')
+    parser.add_argument('--stats', action='store_true', help='print tick cost and bandwidth every few seconds')
+    args = parser.parse_args()
+    Server(args.host, args.port, args.level, args.seed, args.stats).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+# Batch level simulator: plays every map in data/maps with a scripted bot for a
+# number of seeds, spread over a process pool, and prints an aggregated report.
+#
+#   python simulate.py --seeds 16 --maps 0 2 --workers 8 --json report.json
+
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from game import Game
+
+FPS = 60
+
+_game = None  # Per-worker Game instance, created once by _init_worker
+_render = False
+
+
+def _init_worker(render):
+    global _game, _render
+    _game = Game(headless=True)
+    _render = render
+
+
+def _bot_input(game, rng):
+    player = game.player
+    p_rect = player.rect()
+    target = None
+    for enemy in game.enemies:
+        dist = abs(enemy.pos[0] - player.pos[0]) + abs(enemy.pos[1] - player.pos[1])
+        if not target or dist < target[0]:
+            target = (dist, enemy)
+    if not target:
+        game.movement = [False, False]
+        return
+
+    enemy = target[1]
+    dx = enemy.rect().centerx - p_rect.centerx
+    dy = enemy.rect().centery - p_rect.centery
+    game.movement = [dx < 0, dx > 0]
+
+    if abs(dx) < 60 and abs(dy) < 16 and rng.random() < 0.2:
+        player.dash()
+    if player.collisions['left'] or player.collisions['right'] or dy < -16 or rng.random() < 0.01:
+        player.jump()
+
+
+def simulate(map_id, seed, max_ticks):
+    game = _game
+    game.rng.seed(seed)
+    rng = random.Random(seed)
+
+    game.restart(map_id)  # Results must not depend on the job that ran before on this worker
+
+    stats = {
+        'map': map_id,
+        'seed': seed,
+        'completed': False,
+        'time': None,
+        'deaths': 0,
+        'kills': 0,
+        'ticks': 0,
+        'frame_ms': [],
+        'peaks': {'enemies': 0, 'projectiles': 0, 'particles': 0, 'sparks': 0},
+    }
+    peaks = stats['peaks']
+    frame_ms = stats['frame_ms']
+
+    for tick in range(max_ticks):
+        enemies = len(game.enemies)
+        dead = game.dead
+
+        start = time.perf_counter()
+        _bot_input(game, rng)
+        game.update()
+        if _render:
+            game.render()
+        frame_ms.append((time.perf_counter() - start) * 1000)
+
+        if dead and not game.dead:  # The level was reloaded after a death
+            enemies = len(game.enemies)
+        if not dead and game.dead:
+            stats['deaths'] += 1
+        stats['kills'] += max(0, enemies - len(game.enemies))
+
+        peaks['enemies'] = max(peaks['enemies'], len(game.enemies))
+        peaks['projectiles'] = max(peaks['projectiles'], len(game.projectiles))
+        peaks['particles'] = max(peaks['particles'], len(game.particles))
+        peaks['sparks'] = max(peaks['sparks'], len(game.sparks))
+
+        if not game.enemies:
+            stats['completed'] = True
+            stats['time'] = (tick + 1) / FPS
+            break
+
+    stats['ticks'] = len(frame_ms)
+    frame_ms.sort()
+    stats['frame_ms'] = {
+        'mean': statistics.fmean(frame_ms),
+        'p95': frame_ms[int(len(frame_ms) * 0.95)],
+        'max': frame_ms[-1],
+    }
+    return stats
+
+
+def aggregate(runs):
+    report = {}
+    for map_id in sorted({run['map'] for run in runs}):
+        map_runs = [run for run in runs if run['map'] == map_id]
+        times = [run['time'] for run in map_runs if run['completed']]
+        report[map_id] = {
+            'runs': len(map_runs),
+            'completion_rate': len(times) / len(map_runs),
+            'mean_time': statistics.fmean(times) if times else None,
+            'max_time': max(times) if times else None,
+            'mean_deaths': statistics.fmean(run['deaths'] for run in map_runs),
+            'mean_frame_ms': statistics.fmean(run['frame_ms']['mean'] for run in map_runs),
+            'p95_frame_ms': max(run['frame_ms']['p95'] for run in map_runs),
+            'max_frame_ms': max(run['frame_ms']['max'] for run in map_runs),
+            'peaks': {key: max(run['peaks'][key] for run in map_runs) for key in map_runs[0]['peaks']},
+        }
+    return report
+
+
+def print_report(report, elapsed, workers):
+    print('map  runs  done   time(s)  deaths  frame ms (mean/p95/max)   peak enemies/projectiles/particles/sparks')
+    for map_id, row in report.items():
+        mean_time = '%7.1f' % row['mean_time'] if row['mean_time'] is not None else '      -'
+        print('%3d  %4d  %4.0f%%  %s  %6.2f  %6.3f / %6.3f / %6.3f    %d / %d / %d / %d' % (
+            map_id, row['runs'], row['completion_rate'] * 100, mean_time, row['mean_deaths'],
+            row['mean_frame_ms'], row['p95_frame_ms'], row['max_frame_ms'],
+            row['peaks']['enemies'], row['peaks']['projectiles'], row['peaks']['particles'], row['peaks']['sparks']))
+    print('%d runs in %.1fs on %d workers' % (sum(row['runs'] for row in report.values()), elapsed, workers))
+
+
+def main():
+    maps = sorted(int(name.split('.')[0]) for name in os.listdir('data/maps') if name.endswith('.json'))
+
+    parser = argparse.ArgumentParser(description='Simulate levels headlessly across a process pool.')
+    parser.add_argument('--maps', type=int, nargs='+', default=maps, help='map ids to simulate (default: all)')
+    parser.add_argument('--seeds', type=int, default=8, help='number of seeds per map')
+    parser.add_argument('--seed-start', type=int, default=0, help='first seed')
+    parser.add_argument('--max-seconds', type=float, default=120, help='give up on a run after this much game time')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes (default: all cores)')
+    parser.add_argument('--render', action='store_true', help='also render every frame offscreen')
+    parser.add_argument('--json', help='write the full report to this file')
+    args = parser.parse_args()
+
+    max_ticks = int(args.max_seconds * FPS)
+    jobs = [(map_id, seed) for map_id in args.maps for seed in range(args.seed_start, args.seed_start + args.seeds)]
+
+    start = time.perf_counter()
+    runs = []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(args.render,)) as pool:
+        futures = [pool.submit(simulate, map_id, seed, max_ticks) for map_id, seed in jobs]
+        for future in as_completed(futures):
+            runs.append(future.result())
+            print('\r%d/%d' % (len(runs), len(jobs)), end='', flush=True)
+    print()
+    elapsed = time.perf_counter() - start
+
+    report = aggregate(runs)
+    print_report(report, elapsed, args.workers)
+
+    if args.json:
+        f = open(args.json, 'w')
+        json.dump({'report': report, 'runs': sorted(runs, key=lambda run: (run['map'], run['seed']))}, f, indent=2)
+        f.close()
+
+
+if __name__ == '__main__':
+    main()